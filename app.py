@@ -1,34 +1,45 @@
 import tkinter as tk
 from database_manager import DatabaseManager
+from logic.connection_pool import connection_pool
 from logic.dashboard import DashboardLogic
 from logic.device import DeviceManagementLogic
+from logic.outbox import outbox_from_environment
 from logic.user import UserManagementLogic
 from ui.app_settings import SettingsWindow
 from ui.dashboard import DashboardUI
 from ui.device import DeviceManagementUI
 from ui.login import LoginWindow
 from ui.user import UserManagementUI
+from ui.utils.task_runner import TaskRunner
 
 
 class App:
     def __init__(self):
         self.root = tk.Tk()
+        # Runs device and database calls so the window never waits on them
+        self.tasks = TaskRunner(self.root)
         self.db_manager = DatabaseManager()
         self.dashboard_logic = DashboardLogic(self.db_manager)
         self.device_logic = DeviceManagementLogic(self.db_manager)
         self.user_logic = UserManagementLogic(self.db_manager)
+        # Pushes punches to payroll/HR when ATTENDANCE_OUTBOX_URL is set
+        self.outbox = outbox_from_environment(self.db_manager)
+        if self.outbox:
+            self.outbox.start()
         self.screens = {
-            "login": lambda root, navigate: LoginWindow(root, navigate),
+            "login": lambda root, navigate: LoginWindow(root, navigate, self.tasks),
             "dashboard": lambda root, navigate: DashboardUI(
-                root, self.dashboard_logic, navigate
+                root, self.dashboard_logic, navigate, self.tasks
             ),
             "devices": lambda root, navigate: DeviceManagementUI(
-                root, self.device_logic, navigate
+                root, self.device_logic, navigate, self.tasks
             ),
             "users": lambda root, navigate: UserManagementUI(
-                root, self.user_logic, navigate
+                root, self.user_logic, navigate, self.tasks
+            ),
+            "settings": lambda root, navigate: SettingsWindow(
+                root, navigate, self.tasks
             ),
-            "settings": lambda root, navigate: SettingsWindow(root, navigate),
         }
         self.current_screen = None
         # TODO: implement login
@@ -57,6 +68,11 @@ class App:
     def run(self):
         """Start the Tkinter event loop."""
         self.root.mainloop()
+        self.tasks.shutdown()
+        if self.outbox:
+            self.outbox.stop()
+        # Free the terminals for other clients; many accept one session only
+        connection_pool.close_all()
 
 
 if __name__ == "__main__":
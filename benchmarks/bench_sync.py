@@ -0,0 +1,308 @@
+"""Benchmarks for the sync pipeline against simulated devices.
+
+Seeds a database through DatabaseManager, starts a fleet of fake terminals
+(see `simulator`) and times the hot paths. Every benchmark runs in a fresh
+process so its peak RSS is its own. Results are written as JSON:
+
+    python -m benchmarks.bench_sync --output bench_results.json
+    python -m benchmarks.bench_sync --scale 0.01   # quick smoke run
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from queue import Empty
+
+from simulator import FakeZKDevice, FakeZKFleet
+
+BENCHMARKS = [
+    "get_users",
+    "get_attendance",
+    "get_attendance_page",
+    "iter_attendance",
+    "get_card_data_cached",
+    "refresh_device_status",
+    "pull_users_to_db",
+    "pull_attendance_to_db",
+    "sync_data",
+    "sync_data_incremental",
+]
+
+
+# Seconds to wait for a benchmark's result before giving up on its process
+RESULT_TIMEOUT = 3600
+
+PRAGMA_PROFILES = {"default": "DEFAULT_PRAGMAS", "high-ingest": "HIGH_INGEST_PRAGMAS"}
+
+
+def _open_database(db_path, profile="default"):
+    import database_manager
+
+    database_manager.configure_database(
+        db_path, getattr(database_manager, PRAGMA_PROFILES[profile])
+    )
+    return database_manager.DatabaseManager()
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_benchmark(name, db_path, profile, targets, results):
+    """Child process body: time one benchmark and report wall time and RSS.
+
+    get_card_data_cached only reads the device status cache; the probes it
+    starts in the background are what refresh_device_status times.
+
+    Args:
+        name (str): One of `BENCHMARKS`.
+        db_path (str): Seeded database file.
+        profile (str): Key of `PRAGMA_PROFILES`.
+        targets (dict): "pull" is the (ip, port) of the device used by the pull
+            benchmarks, "fleet_rows" the users plus punches held by the fleet.
+        results (multiprocessing.Queue): Receives the result dict.
+    """
+    db_manager = _open_database(db_path, profile)
+
+    from logic.dashboard import DashboardLogic
+    from logic.device_control import FingerprintDeviceManager
+    from logic.device_status import DeviceStatusMonitor
+
+    rows = 0
+    start = time.perf_counter()
+    if name == "get_users":
+        rows = len(db_manager.get_users())
+    elif name == "get_attendance":
+        rows = len(db_manager.get_attendance())
+    elif name == "get_attendance_page":
+        rows = len(db_manager.get_attendance_page(limit=100)[0])
+    elif name == "iter_attendance":
+        rows = sum(1 for _ in db_manager.iter_attendance())
+    elif name == "get_card_data_cached":
+        DashboardLogic(db_manager).get_card_data()
+        rows = 1
+    elif name == "refresh_device_status":
+        devices = db_manager.get_devices()
+        DeviceStatusMonitor(db_manager).refresh(devices)
+        rows = len(devices)
+    elif name in ("pull_users_to_db", "pull_attendance_to_db"):
+        fdm = FingerprintDeviceManager(
+            ip=targets["pull"][0], port=targets["pull"][1], db_manager=db_manager
+        )
+        fdm.connect(read_only=True)
+        if name == "pull_users_to_db":
+            fdm.pull_users_to_db()
+        else:
+            fdm.pull_attendance_to_db(full=True)
+        rows = fdm.conn.users if name == "pull_users_to_db" else fdm.conn.records
+        fdm.disconnect()
+    elif name.startswith("sync_data"):
+        DashboardLogic(db_manager).sync_data()
+        rows = targets["fleet_rows"]
+    wall_time = time.perf_counter() - start
+    # Let foreground work finish before exiting; daemon threads such as the
+    # attendance writer idle until the process ends and would only add waits
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and not thread.daemon:
+            thread.join(timeout=10)
+
+    results.put(
+        {
+            "name": name,
+            "wall_time": round(wall_time, 4),
+            "peak_rss_mb": _peak_rss_mb(),
+            "rows": rows,
+            "rows_per_sec": round(rows / wall_time, 1) if wall_time else None,
+        }
+    )
+
+
+def seed(db_manager, users, attendance, fleet):
+    """Seed users, devices and attendance history through DatabaseManager."""
+    from database_manager import Attendance, Device
+    from logic.device_control import ATTENDANCE_FIELDS
+
+    db_manager.initialize_tables()
+    if Attendance.select().count() < attendance:
+        print(f"Seeding {users} users and {attendance} attendance rows...")
+        db_manager.bulk_upsert_users(
+            [
+                {
+                    "name": f"User {user_id}",
+                    "privilege": "User",
+                    "password": "",
+                    "user_id": user_id,
+                    "group_id": 1,
+                    "device_id": None,
+                }
+                for user_id in range(1001, 1001 + users)
+            ]
+        )
+        # History older than anything the simulated devices hold
+        start = datetime(2020, 1, 1, 8, 0)
+        missing = attendance - Attendance.select().count()
+        now = datetime.now()
+        db_manager.insert_attendance_many(
+            (
+                (
+                    1001 + index % users,
+                    start + timedelta(seconds=index),
+                    "in" if index % 2 else "out",
+                    "10.0.0.1",
+                    True,
+                    now,
+                    now,
+                )
+                for index in range(missing)
+            ),
+            fields=ATTENDANCE_FIELDS,
+        )
+
+    # Point the registered devices at this run's fleet and reset checkpoints
+    Device.delete().execute()
+    for index, device in enumerate(fleet.devices):
+        db_manager.insert_device(
+            {
+                "name": f"Simulated {index}",
+                "device_model": "FakeZK",
+                "serial_number": device.serial_number,
+                "ip": device.host,
+                "port": device.port,
+            }
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sync pipeline.")
+    parser.add_argument("--db", default="bench_data.db", help="database file")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument(
+        "--pragmas", choices=PRAGMA_PROFILES, default="default", help="SQLite profile"
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--attendance", type=int, default=5_000_000)
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument(
+        "--device-attendance", type=int, default=10_000, help="punches per device"
+    )
+    parser.add_argument(
+        "--pull-attendance",
+        type=int,
+        default=100_000,
+        help="punches on the device used by the pull benchmarks",
+    )
+    parser.add_argument("--latency", type=float, default=0.002, help="reply delay (s)")
+    parser.add_argument("--dead", type=int, default=0, help="dead devices in fleet")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiply every volume by this"
+    )
+    parser.add_argument(
+        "--only", nargs="*", choices=BENCHMARKS, help="run only these benchmarks"
+    )
+    args = parser.parse_args()
+
+    def scaled(value):
+        return max(1, int(value * args.scale))
+
+    users = scaled(args.users)
+    devices = scaled(args.devices)
+    volumes = {
+        "users": users,
+        "attendance": scaled(args.attendance),
+        "devices": devices,
+        "device_attendance": scaled(args.device_attendance),
+        "pull_attendance": scaled(args.pull_attendance),
+        "latency": args.latency,
+        "dead_devices": args.dead,
+    }
+
+    fleet = FakeZKFleet(
+        devices,
+        dead_count=args.dead,
+        distinct_users=True,
+        users=max(1, users // devices),
+        attendance=volumes["device_attendance"],
+        latency=args.latency,
+    )
+    pull_device = FakeZKDevice(
+        users=users,
+        attendance=volumes["pull_attendance"],
+        latency=args.latency,
+        serial_number="SIM-PULL",
+    )
+    results = []
+    with fleet, pull_device:
+        db_manager = _open_database(args.db, args.pragmas)
+        seed(db_manager, users, volumes["attendance"], fleet)
+        db_manager.close()
+
+        targets = {
+            "pull": pull_device.address,
+            "fleet_rows": sum(
+                device.user_count + device.record_count
+                for device in fleet.devices
+                if not device.dead
+            ),
+        }
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        for name in args.only or BENCHMARKS:
+            process = context.Process(
+                target=_run_benchmark,
+                args=(name, args.db, args.pragmas, targets, queue),
+            )
+            process.start()
+            result = None
+            # A child that crashes never reports; poll instead of waiting forever
+            deadline = time.monotonic() + RESULT_TIMEOUT
+            while result is None and time.monotonic() < deadline:
+                try:
+                    result = queue.get(timeout=1)
+                except Empty:
+                    if process.exitcode is None:
+                        continue
+                    # It may have reported just before exiting
+                    try:
+                        result = queue.get(timeout=1)
+                    except Empty:
+                        break
+            if result is None:
+                process.terminate()
+                process.join()
+                print(f"{name:24} failed (exit code {process.exitcode})")
+                results.append({"name": name, "exitcode": process.exitcode})
+                continue
+            process.join()
+            results.append(result)
+            print(
+                f"{name:24} {result['wall_time']:>10.3f}s "
+                f"{result['peak_rss_mb']:>9.1f} MB {result['rows']:>10} rows"
+            )
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pragmas": args.pragmas,
+        "volumes": volumes,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,72 @@
-from peewee import *
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
+
+from peewee import *
+from playhouse.migrate import SqliteMigrator, migrate
+from playhouse.pool import PooledSqliteDatabase
+
+# SQLite settings applied to every new connection. WAL lets the UI read while
+# a sync writes, and with synchronous=NORMAL a commit no longer waits for an
+# fsync (it survives an application crash; a power cut can only roll back the
+# last few commits, never corrupt the file).
+DEFAULT_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -16000,  # In KiB when negative: 16 MB
+    "mmap_size": 64 * 1024 * 1024,
+    "temp_store": "memory",
+    "busy_timeout": 5000,  # ms a connection waits for a lock before failing
+}
+
+# For servers pulling large fleets: more cache and memory-mapped reads, and
+# fewer, larger WAL checkpoints during bulk ingestion.
+HIGH_INGEST_PRAGMAS = dict(
+    DEFAULT_PRAGMAS,
+    cache_size=-64000,  # 64 MB
+    mmap_size=256 * 1024 * 1024,
+    wal_autocheckpoint=10000,  # Pages, ~40 MB of WAL between checkpoints
+    journal_size_limit=64 * 1024 * 1024,  # Truncate the WAL back after a checkpoint
+)
+
+# Connections are per thread (peewee keeps connection state thread-local).
+# Closing one hands it back to the pool, so short-lived worker threads reuse
+# open connections instead of reopening the file.
+POOL_OPTIONS = {
+    "max_connections": 32,
+    "stale_timeout": 300,  # Seconds before an idle connection is reopened
+    "timeout": 10,  # Seconds to wait for a free connection when all are in use
+    "check_same_thread": False,  # Pooled connections move between threads
+}
 
-database = SqliteDatabase("app_data.db")
+database = PooledSqliteDatabase("app_data.db", pragmas=DEFAULT_PRAGMAS, **POOL_OPTIONS)
+
+
+def configure_database(path=None, pragmas=None):
+    """Point the shared database at another file and/or other pragmas.
+
+    Every pooled connection, in use or idle, is closed so that none keeps
+    serving the old file or pragmas, and the new file is migrated on the next
+    `DatabaseManager`. Call it while no other thread is using the database.
+
+    Args:
+        path (str, optional): SQLite file (default: keep the current one).
+        pragmas (dict, optional): Pragmas applied at connect, e.g.
+            `HIGH_INGEST_PRAGMAS` (default: `DEFAULT_PRAGMAS`).
+    """
+    database.close_all()
+    DatabaseManager._migrated = False
+    # The writer thread's connection was just closed; start a fresh one on demand
+    DatabaseManager._ingest_writer = None
+    database.init(
+        path or database.database,
+        pragmas=pragmas or DEFAULT_PRAGMAS,
+        **POOL_OPTIONS,
+    )
 
 
 class BaseModel(Model):
@@ -26,6 +91,11 @@ class User(BaseModel):
         table_name = "users"
 
 
+# Name prefix and group lookups for user search (see search_users)
+User.add_index(User.index(User.name.collate("NOCASE"), name="users_name_nocase"))
+User.add_index(User.index(User.group_id, name="users_group_id"))
+
+
 class Device(BaseModel):
     id = AutoField(primary_key=True)
     name = CharField()
@@ -33,6 +103,11 @@ class Device(BaseModel):
     serial_number = CharField(unique=True)
     ip = CharField()
     port = IntegerField()
+    # Attendance checkpoint: device log size and newest punch at the last pull
+    last_record_count = IntegerField(default=0)
+    last_attendance_at = DateTimeField(null=True)
+    # Retention: clear the device log once a pull is committed and verified
+    clear_after_ingest = BooleanField(default=False)
     created_at = DateTimeField(default=datetime.now)
     updated_at = DateTimeField(default=datetime.now)
 
@@ -56,13 +131,187 @@ class Attendance(BaseModel):
         indexes = (
             # Index on user_id and timestamp for efficient queries
             (("user_id", "timestamp"), False),
+            # One row per punch per device; lets ingestion skip duplicates
+            (("user_id", "timestamp", "device_ip"), True),
         )
 
 
+# Rows still waiting for the outbox; stays small however large the table grows
+Attendance.add_index(
+    Attendance.index(Attendance.id, where=SQL("synced = 0"), name="attendance_unsynced")
+)
+
+
+class AttendanceClear(BaseModel):
+    """Journal of device log clears.
+
+    Written before the clear command is sent and completed after it; a row
+    left "pending" means the clear may or may not have happened.
+    """
+
+    id = AutoField()
+    device = ForeignKeyField(
+        Device, null=True, on_delete="SET NULL", column_name="device_id"
+    )
+    device_ip = CharField()
+    device_port = IntegerField()
+    record_count = IntegerField()  # Device log size that was verified
+    last_attendance_at = DateTimeField(null=True)
+    status = CharField(default="pending")  # "pending", "cleared" or "recovered"
+    created_at = DateTimeField(default=datetime.now)
+    updated_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        table_name = "attendance_clears"
+
+
+class AttendanceIngestWriter:
+    """Single writer thread for attendance rows.
+
+    Producers submit batches to a bounded queue and get a Future back; the
+    writer gathers whatever is queued into one transaction, committing once
+    `batch_rows` rows are gathered or `flush_interval` seconds after the
+    first one arrived, then resolves each Future with the number of rows
+    that batch inserted. A full queue blocks producers, so ingestion runs at
+    the speed of the disk instead of piling up in memory.
+    """
+
+    def __init__(
+        self, db_manager, max_batches=64, batch_rows=20000, flush_interval=0.02
+    ):
+        """Initialize the writer; its thread starts with the first submission.
+
+        Args:
+            db_manager (DatabaseManager): Manager whose connection and write
+                lock the writer uses.
+            max_batches (int): Queued batches before producers block (default: 64).
+            batch_rows (int): Rows that trigger a commit (default: 20000).
+            flush_interval (float): Seconds a batch may wait for others to
+                share its transaction (default: 0.02).
+        """
+        self.db_manager = db_manager
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_batches)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, rows, fields=None, timeout=None):
+        """Queue a batch of attendance rows, blocking while the queue is full.
+
+        Args:
+            rows (list): Tuples of values in `fields` order, or dicts sharing
+                the same keys; fields missing from dicts get their defaults.
+            fields (sequence, optional): Field names for tuple rows.
+            timeout (float, optional): Seconds to wait for queue space
+                (default: wait indefinitely).
+
+        Returns:
+            tuple: (success: bool, future: Future or message: str)
+            The Future resolves to the number of rows inserted.
+        """
+        rows = list(rows)
+        if rows and fields is None:
+            fields, rows = self._tuples(rows)
+        future = Future()
+        if not rows:
+            future.set_result(0)
+            return True, future
+        self._start()
+        try:
+            self._queue.put((tuple(fields), rows, future), timeout=timeout)
+        except queue.Full:
+            return False, "Attendance ingest queue is full."
+        return True, future
+
+    @staticmethod
+    def _tuples(rows):
+        """Turn dict rows into tuples, filling in the model's field defaults."""
+        defaults = {
+            name: field.default() if callable(field.default) else field.default
+            for name, field in Attendance._meta.fields.items()
+            if field.default is not None and name not in rows[0]
+        }
+        fields = tuple(rows[0]) + tuple(defaults)
+        values = tuple(defaults.values())
+        return fields, [tuple(row[name] for name in rows[0]) + values for row in rows]
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="attendance-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _gather(self):
+        """Block for one batch, then take more until the commit is due."""
+        group = [self._queue.get()]
+        rows = len(group[0][1])
+        deadline = time.monotonic() + self.flush_interval
+        while rows < self.batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                group.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+            rows += len(group[-1][1])
+        return group
+
+    def _write(self, group):
+        """Insert the batches of a group in one transaction.
+
+        Returns:
+            list: Rows inserted per batch.
+        """
+        with self.db_manager._atomic():
+            return [
+                self.db_manager._insert_many(
+                    Attendance, fields, rows, "ON CONFLICT DO NOTHING"
+                )
+                for fields, rows, _ in group
+            ]
+
+    def _run(self):
+        with self.db_manager.connection():
+            while True:
+                group = self._gather()
+                try:
+                    inserted = self._write(group)
+                except Exception:
+                    # One producer's bad batch must not fail the others: retry
+                    # each on its own and fail only the ones that fail again
+                    for batch in group:
+                        try:
+                            batch[2].set_result(self._write([batch])[0])
+                        except Exception as e:
+                            batch[2].set_exception(e)
+                    continue
+                for (_, _, future), count in zip(group, inserted):
+                    future.set_result(count)
+
+
 class DatabaseManager:
+    """Reads and writes the application database.
+
+    Each thread works on its own pooled connection, opened on first use; see
+    `connection`. Reads take no lock and, in WAL mode, never wait for a
+    writer. Writes go through `_atomic`, one at a time.
+    """
+
+    # Shared by every manager: they all write through the same SQLite file,
+    # which only ever admits a single writer.
+    _write_lock = threading.RLock()
+    _migrated = False
+    _ingest_writer = None
+    _ingest_lock = threading.Lock()
+
     def __init__(self):
         self.database = database
         self._connect_once()
+        self._apply_migrations()
 
     def _connect_once(self):
         print("Connecting...")
@@ -70,6 +319,138 @@ class DatabaseManager:
             return
         self.database.connect(reuse_if_open=True)
 
+    @contextmanager
+    def connection(self):
+        """Hold a connection for the calling thread for the duration of the block.
+
+        Worker threads should wrap their database work in this so the
+        connection goes back to the pool when they finish. A connection the
+        thread already had open is left open.
+        """
+        opened = self.database.is_closed()
+        if opened:
+            self.database.connect()
+        try:
+            yield self.database
+        finally:
+            if opened and not self.database.is_closed():
+                self.database.close()
+
+    @contextmanager
+    def _atomic(self):
+        """Run a write transaction, serialised across threads.
+
+        The transaction takes SQLite's write lock when it begins, so another
+        process holding it makes this wait (busy_timeout) instead of failing
+        midway on a lock upgrade.
+        """
+        with self._write_lock, self.database.atomic("IMMEDIATE"):
+            yield
+
+    def _insert_many(self, model, fields, rows, conflict=""):
+        """Insert rows of database-ready values with one prepared statement.
+
+        Uses the driver's executemany instead of peewee's insert_many, whose
+        per-value SQL generation dominates the cost of bulk inserts. Must run
+        inside `_atomic`.
+
+        Args:
+            model (Model): Target table.
+            fields (sequence): Field names, in the order of each row's values.
+            rows (iterable): Tuples of values; consumed lazily.
+            conflict (str): Conflict clause appended to the statement, e.g.
+                "ON CONFLICT DO NOTHING" (default: none).
+
+        Returns:
+            int: Number of rows written.
+        """
+        columns = ", ".join(
+            f'"{model._meta.combined[name].column_name}"' for name in fields
+        )
+        placeholders = ", ".join("?" for _ in fields)
+        sql = (
+            f'INSERT INTO "{model._meta.table_name}" ({columns}) '
+            f"VALUES ({placeholders}) {conflict}"
+        )
+        cursor = self.database.cursor()
+        cursor.executemany(sql, rows)
+        return max(cursor.rowcount, 0)
+
+    def sync(self):
+        """Make every committed transaction durable on disk.
+
+        Under WAL with synchronous=NORMAL the latest commits are only fsynced
+        at the next checkpoint; this runs one now. Call it before acting on
+        the assumption that data survives a power cut, e.g. clearing a device.
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        self._connect_once()
+        try:
+            with self._write_lock:
+                mode = self.database.execute_sql("PRAGMA journal_mode").fetchone()[0]
+                if mode != "wal":
+                    return True, "Database is synchronous."
+                busy, _, _ = self.database.execute_sql(
+                    "PRAGMA wal_checkpoint(FULL)"
+                ).fetchone()
+            if busy:
+                return False, "Database checkpoint blocked by another connection."
+            return True, "Database checkpointed."
+        except Exception as e:
+            return False, f"Failed to sync database: {str(e)}"
+
+    def _apply_migrations(self):
+        """Bring tables created by older versions up to the current schema."""
+        if DatabaseManager._migrated:
+            return
+        try:
+            tables = self.database.get_tables()
+            if "devices" in tables:
+                columns = {
+                    column.name for column in self.database.get_columns("devices")
+                }
+                migrator = SqliteMigrator(self.database)
+                operations = [
+                    migrator.add_column("devices", field.column_name, field)
+                    for field in (
+                        Device.last_record_count,
+                        Device.last_attendance_at,
+                        Device.clear_after_ingest,
+                    )
+                    if field.column_name not in columns
+                ]
+                if operations:
+                    with self._atomic():
+                        migrate(*operations)
+                if "attendance_clears" not in tables:
+                    AttendanceClear.create_table(safe=True)
+            if "users" in tables:
+                indexes = {index.name for index in self.database.get_indexes("users")}
+                if not {"users_name_nocase", "users_group_id"} <= indexes:
+                    with self._atomic():
+                        User._schema.create_indexes(safe=True)
+            if "attendance" in tables:
+                indexes = {
+                    index.name for index in self.database.get_indexes("attendance")
+                }
+                if "attendance_user_id_timestamp_device_ip" not in indexes:
+                    with self._atomic():
+                        # Duplicates would block the unique index; keep the oldest copy.
+                        self.database.execute_sql(
+                            "DELETE FROM attendance WHERE id NOT IN ("
+                            "SELECT MIN(id) FROM attendance "
+                            "GROUP BY user_id, timestamp, device_ip)"
+                        )
+                        Attendance._schema.create_indexes(safe=True)
+                elif "attendance_unsynced" not in indexes:
+                    with self._atomic():
+                        Attendance._schema.create_indexes(safe=True)
+            DatabaseManager._migrated = True
+        except Exception as e:
+            print(f"Failed to migrate database: {str(e)}")
+
     def check_connection(self):
         try:
             self._connect_once()
@@ -87,8 +468,12 @@ class DatabaseManager:
             User._meta.database = self.database
             Device._meta.database = self.database
             Attendance._meta.database = self.database
+            AttendanceClear._meta.database = self.database
 
-            self.database.create_tables([Device, User, Attendance], safe=True)
+            self._apply_migrations()
+            self.database.create_tables(
+                [Device, User, Attendance, AttendanceClear], safe=True
+            )
             print("Tables initialized.")
             return True, "Database and tables created successfully!"
         except Exception as e:
@@ -96,7 +481,7 @@ class DatabaseManager:
 
     def insert_user(self, user_data):
         self._connect_once()
-        with self.database.atomic():
+        with self._atomic():
             try:
                 user = User.create(
                     name=user_data["name"],
@@ -128,9 +513,202 @@ class DatabaseManager:
             for user in User.select()
         ]
 
+    def get_user(self, id_user):
+        """Return the user with primary key `id_user` as a dict, or None.
+
+        The dict has the same keys as the ones returned by `get_users`.
+        """
+        self._connect_once()
+        user = User.select().where(User.id == id_user).dicts().first()
+        if user:
+            user["device_id"] = user.pop("device")
+        return user
+
+    def get_users_page(self, after_id=None, limit=100, user_id=None, device_id=None):
+        """Return one page of users in id order, resuming after a cursor.
+
+        Keyset pagination: the page starts right after `after_id` instead of
+        skipping rows with OFFSET, so every page costs the same.
+
+        Args:
+            after_id (int, optional): Cursor returned by the previous page.
+            limit (int): Maximum users returned (default: 100).
+            user_id (int, optional): Only the user with this user_id.
+            device_id (int, optional): Only users pulled from this device.
+
+        Returns:
+            tuple: (users: list, next_cursor: int or None)
+            users: Dicts as returned by `get_users`. next_cursor is None once
+            the last page has been returned.
+        """
+        self._connect_once()
+        query = User.select()
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        if user_id is not None:
+            query = query.where(User.user_id == user_id)
+        if device_id is not None:
+            query = query.where(User.device == device_id)
+        users = list(query.order_by(User.id).limit(limit).dicts())
+        for user in users:
+            user["device_id"] = user.pop("device")
+        next_cursor = users[-1]["id"] if len(users) == limit else None
+        return users, next_cursor
+
+    def search_users(
+        self,
+        name=None,
+        user_id=None,
+        group_id=None,
+        device_id=None,
+        after=None,
+        limit=100,
+    ):
+        """Return one page of users matching every given filter, by name.
+
+        A name prefix becomes a range on the case-insensitive name index
+        (SQLite won't use an index for LIKE on a case-sensitive column), so a
+        page costs about the same however many users there are. Pages are
+        ordered by name, then id, and resume after a (name, id) cursor.
+
+        Args:
+            name (str, optional): Case-insensitive name prefix (ASCII letters
+                only are folded, like SQLite's NOCASE).
+            user_id (int, optional): Only the user with this user_id.
+            group_id (int, optional): Only users in this group.
+            device_id (int, optional): Only users pulled from this device.
+            after (tuple, optional): Cursor returned by the previous page.
+            limit (int): Maximum users returned (default: 100).
+
+        Returns:
+            tuple: (users: list, next_cursor: tuple or None)
+            users: Dicts as returned by `get_users`. next_cursor is None once
+            the last page has been returned.
+        """
+        self._connect_once()
+        sort_name = User.name.collate("NOCASE")
+        query = User.select()
+        if name:
+            low = "".join(c.lower() if c.isascii() else c for c in name)
+            # Smallest string past every match in NOCASE order, where A-Z fold
+            # into a-z and '@' is followed by '[' rather than 'A'
+            last = chr(ord(low[-1]) + 1)
+            high = low[:-1] + ("[" if "A" <= last <= "Z" else last)
+            query = query.where((sort_name >= low) & (sort_name < high))
+        if user_id is not None:
+            query = query.where(User.user_id == user_id)
+        if group_id is not None:
+            query = query.where(User.group_id == group_id)
+        if device_id is not None:
+            query = query.where(User.device == device_id)
+        if after is not None:
+            query = query.where(Tuple(sort_name, User.id) > Tuple(*after))
+        users = list(query.order_by(sort_name, User.id).limit(limit).dicts())
+        for user in users:
+            user["device_id"] = user.pop("device")
+        next_cursor = (
+            (users[-1]["name"], users[-1]["id"]) if len(users) == limit else None
+        )
+        return users, next_cursor
+
+    def iter_users(self, batch_size=1000, **filters):
+        """Stream users in id order, one page query at a time.
+
+        Args:
+            batch_size (int): Users fetched per query (default: 1000).
+            **filters: user_id and device_id, see `get_users_page`.
+
+        Yields:
+            dict: One user, as returned by `get_users`.
+        """
+        cursor = None
+        while True:
+            users, cursor = self.get_users_page(cursor, batch_size, **filters)
+            yield from users
+            if cursor is None:
+                return
+
+    def bulk_upsert_users(self, users_data, chunk_size=100):
+        """Insert or update many users in a single transaction, keyed on user_id.
+
+        Existing rows are read with one set-based query per chunk; new users are
+        inserted with multi-row INSERTs and changed users are rewritten with
+        INSERT ... ON CONFLICT(user_id) DO UPDATE. Rows whose fields already
+        match are left untouched.
+
+        Args:
+            users_data (list): Dicts with keys name, privilege, password, user_id,
+                group_id and optionally device_id. Later entries win on duplicate
+                user_id.
+            chunk_size (int): Rows per statement, kept under SQLite's bound
+                parameter limit (default: 100).
+
+        Returns:
+            tuple: (success: bool, counts: dict or message: str)
+            counts: Dict with keys inserted, updated, unchanged.
+        """
+        fields = ("name", "privilege", "password", "group_id", "device_id")
+        incoming = {user["user_id"]: user for user in users_data}
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        now = datetime.now()
+
+        try:
+            with self._atomic():
+                existing = {}
+                for batch in chunked(list(incoming), chunk_size):
+                    query = User.select(
+                        User.user_id,
+                        User.name,
+                        User.privilege,
+                        User.password,
+                        User.group_id,
+                        User.device,
+                    ).where(User.user_id.in_(batch))
+                    for row in query.dicts():
+                        row["device_id"] = row.pop("device")
+                        existing[row["user_id"]] = row
+
+                new_rows, changed_rows = [], []
+                for user_id, user in incoming.items():
+                    row = {field: user.get(field) for field in fields}
+                    row["user_id"] = user_id
+                    current = existing.get(user_id)
+                    if current is None:
+                        new_rows.append(row)
+                    elif any(current[field] != row[field] for field in fields):
+                        changed_rows.append(row)
+                    else:
+                        counts["unchanged"] += 1
+                    row["created_at"] = now
+                    row["updated_at"] = now
+
+                columns = fields + ("user_id", "created_at", "updated_at")
+                self._insert_many(
+                    User, columns, ([row[c] for c in columns] for row in new_rows)
+                )
+                self._insert_many(
+                    User,
+                    columns,
+                    ([row[c] for c in columns] for row in changed_rows),
+                    conflict="ON CONFLICT(user_id) DO UPDATE SET "
+                    + ", ".join(
+                        f'"{c}" = excluded."{c}"' for c in fields + ("updated_at",)
+                    ),
+                )
+
+                counts["inserted"] = len(new_rows)
+                counts["updated"] = len(changed_rows)
+            return True, counts
+        except IntegrityError as e:
+            return False, f"Failed to upsert users: {str(e)}"
+
+    def count_users(self):
+        self._connect_once()
+        return User.select().count()
+
     def update_user(self, id_user, user_data):
         self._connect_once()
-        with self.database.atomic():
+        with self._atomic():
             user = User.get_or_none(User.id == id_user)
             if user:
                 try:
@@ -149,7 +727,7 @@ class DatabaseManager:
 
     def delete_user(self, id_user):
         self._connect_once()
-        with self.database.atomic():
+        with self._atomic():
             user = User.get_or_none(User.id == id_user)
             if user:
                 user.delete_instance()
@@ -158,7 +736,7 @@ class DatabaseManager:
 
     def insert_device(self, device_data):
         self._connect_once()
-        with self.database.atomic():
+        with self._atomic():
             try:
                 device = Device.create(
                     name=device_data["name"],
@@ -166,6 +744,7 @@ class DatabaseManager:
                     serial_number=device_data["serial_number"],
                     ip=device_data["ip"],
                     port=device_data["port"],
+                    clear_after_ingest=device_data.get("clear_after_ingest", False),
                     updated_at=datetime.now(),
                 )
                 return True, device.id
@@ -182,15 +761,122 @@ class DatabaseManager:
                 "serial_number": device.serial_number,
                 "ip": device.ip,
                 "port": device.port,
+                "last_record_count": device.last_record_count,
+                "last_attendance_at": device.last_attendance_at,
+                "clear_after_ingest": device.clear_after_ingest,
                 "created_at": device.created_at,
                 "updated_at": device.updated_at,
             }
             for device in Device.select()
         ]
 
+    def get_device(self, device_id):
+        """Return the device with primary key `device_id` as a dict, or None."""
+        self._connect_once()
+        return Device.select().where(Device.id == device_id).dicts().first()
+
+    def get_device_by_address(self, ip, port):
+        """Return the device registered at ip:port as a dict, or None."""
+        self._connect_once()
+        return (
+            Device.select()
+            .where((Device.ip == ip) & (Device.port == port))
+            .dicts()
+            .first()
+        )
+
+    def update_device_checkpoint(self, device_id, record_count, last_attendance_at):
+        """Store the attendance high-water mark reached by the last pull.
+
+        Args:
+            device_id (int): Device primary key.
+            record_count (int): Number of records in the device log.
+            last_attendance_at (datetime): Newest punch ingested so far.
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        with self._atomic():
+            updated = (
+                Device.update(
+                    last_record_count=record_count,
+                    last_attendance_at=last_attendance_at,
+                )
+                .where(Device.id == device_id)
+                .execute()
+            )
+        if not updated:
+            return False, "Device not found."
+        return True, "Device checkpoint updated."
+
+    def get_pending_attendance_clears(self, ip, port):
+        """Return journal entries of clears against ip:port that never completed."""
+        self._connect_once()
+        return list(
+            AttendanceClear.select()
+            .where(
+                (AttendanceClear.device_ip == ip)
+                & (AttendanceClear.device_port == port)
+                & (AttendanceClear.status == "pending")
+            )
+            .dicts()
+        )
+
+    def start_attendance_clear(
+        self, device_id, ip, port, record_count, last_attendance_at
+    ):
+        """Journal a device log clear that is about to be sent.
+
+        Args:
+            device_id (int): Device primary key, or None for unregistered devices.
+            ip (str): Device IP address.
+            port (int): Device port.
+            record_count (int): Device log size verified as stored.
+            last_attendance_at (datetime): Newest punch in the verified log.
+
+        Returns:
+            tuple: (success: bool, clear_id: int or message: str)
+        """
+        try:
+            with self._atomic():
+                entry = AttendanceClear.create(
+                    device=device_id,
+                    device_ip=ip,
+                    device_port=port,
+                    record_count=record_count,
+                    last_attendance_at=last_attendance_at,
+                )
+            return True, entry.id
+        except Exception as e:
+            return False, f"Failed to journal attendance clear: {str(e)}"
+
+    def finish_attendance_clear(self, clear_id, status="cleared"):
+        """Complete a journalled clear and restart the device's checkpoint.
+
+        Args:
+            clear_id (int): Journal entry returned by `start_attendance_clear`.
+            status (str): "cleared" once the device confirmed the clear, or
+                "recovered" when a later full pull resolved an interrupted one.
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        with self._atomic():
+            entry = AttendanceClear.get_or_none(AttendanceClear.id == clear_id)
+            if not entry:
+                return False, "Attendance clear not found."
+            entry.status = status
+            entry.updated_at = datetime.now()
+            entry.save()
+            if status == "cleared" and entry.device_id:
+                Device.update(last_record_count=0).where(
+                    Device.id == entry.device_id
+                ).execute()
+        return True, f"Attendance clear {status}."
+
     def update_device(self, device_id, device_data):
         self._connect_once()
-        with self.database.atomic():
+        with self._atomic():
             device = Device.get_or_none(Device.id == device_id)
             if device:
                 try:
@@ -199,6 +885,8 @@ class DatabaseManager:
                     device.serial_number = device_data["serial_number"]
                     device.ip = device_data["ip"]
                     device.port = device_data["port"]
+                    if "clear_after_ingest" in device_data:
+                        device.clear_after_ingest = device_data["clear_after_ingest"]
                     device.updated_at = datetime.now()
                     device.save()
                     return True, "Device updated successfully!"
@@ -208,7 +896,7 @@ class DatabaseManager:
 
     def delete_device(self, device_id):
         self._connect_once()
-        with self.database.atomic():
+        with self._atomic():
             device = Device.get_or_none(Device.id == device_id)
             if device:
                 device.delete_instance()
@@ -217,15 +905,110 @@ class DatabaseManager:
 
     def insert_attendance(self, attendance_data):
         try:
-            with self.database.atomic():
+            with self._atomic():
                 Attendance.create(**attendance_data)
                 return True, "Attendance recorded successfully."
         except Exception as e:
             return False, f"Failed to record attendance: {str(e)}"
 
+    def insert_attendance_many(self, attendance_data, chunk_size=100, fields=None):
+        """Insert attendance records in bulk, skipping ones already stored.
+
+        Duplicates are detected by the unique (user_id, timestamp, device_ip)
+        index, so each chunk is a single INSERT OR IGNORE and the whole batch
+        is one transaction.
+
+        Args:
+            attendance_data (iterable): Dicts of Attendance field values, or
+                tuples of values in `fields` order. Consumed lazily.
+            chunk_size (int): Dict rows per statement, kept under SQLite's bound
+                parameter limit (default: 100).
+            fields (sequence, optional): Field names when rows are tuples. Tuple
+                rows skip peewee's query building and go through one prepared
+                statement, which is much faster for large pulls.
+
+        Returns:
+            tuple: (success: bool, inserted: int or message: str)
+        """
+        inserted = 0
+        try:
+            with self._atomic():
+                if fields:
+                    return True, self._insert_many(
+                        Attendance, fields, attendance_data, "ON CONFLICT DO NOTHING"
+                    )
+                for batch in chunked(attendance_data, chunk_size):
+                    inserted += (
+                        Attendance.insert_many(batch)
+                        .on_conflict_ignore()
+                        .as_rowcount()
+                        .execute()
+                    )
+            return True, inserted
+        except Exception as e:
+            return False, f"Failed to record attendance: {str(e)}"
+
+    def submit_attendance(self, rows, fields=None, timeout=None):
+        """Queue attendance rows for the shared writer thread.
+
+        See `AttendanceIngestWriter.submit`.
+
+        Returns:
+            tuple: (success: bool, future: Future or message: str)
+        """
+        with DatabaseManager._ingest_lock:
+            if DatabaseManager._ingest_writer is None:
+                DatabaseManager._ingest_writer = AttendanceIngestWriter(self)
+        return DatabaseManager._ingest_writer.submit(rows, fields, timeout)
+
+    def ingest_attendance(
+        self, attendance_data, fields=None, chunk_size=5000, on_committed=None
+    ):
+        """Insert attendance through the writer thread and wait until committed.
+
+        Rows are submitted in chunks as they are produced, so a slow producer
+        (e.g. decoding a device log) overlaps with the writes, and the writer
+        can share its transactions with other producers. Records already
+        stored are skipped by the unique index.
+
+        Args:
+            attendance_data (iterable): Tuples in `fields` order, or dicts.
+            fields (sequence, optional): Field names for tuple rows.
+            chunk_size (int): Rows per submitted batch (default: 5000).
+            on_committed (callable, optional): Called with the running total of
+                rows inserted each time a batch commits, usually from the writer
+                thread.
+
+        Returns:
+            tuple: (success: bool, inserted: int or message: str)
+        """
+        futures = []
+        rows = iter(attendance_data)
+        committed = 0
+        committed_lock = threading.Lock()
+
+        def batch_committed(future):
+            nonlocal committed
+            if future.exception() is None:
+                with committed_lock:
+                    committed += future.result()
+                    on_committed(committed)
+
+        try:
+            while chunk := list(islice(rows, chunk_size)):
+                success, future = self.submit_attendance(chunk, fields)
+                if not success:
+                    return False, future
+                if on_committed:
+                    future.add_done_callback(batch_committed)
+                futures.append(future)
+            return True, sum(future.result() for future in futures)
+        except Exception as e:
+            return False, f"Failed to record attendance: {str(e)}"
+
     def update_attendance(self, attendance_id, attendance_data):
         try:
-            with self.database.atomic():
+            with self._atomic():
                 attendance = Attendance.get_or_none(Attendance.id == attendance_id)
                 if not attendance:
                     return False, "Attendance record not found."
@@ -238,7 +1021,7 @@ class DatabaseManager:
 
     def delete_attendance(self, attendance_id):
         try:
-            with self.database.atomic():
+            with self._atomic():
                 attendance = Attendance.get_or_none(Attendance.id == attendance_id)
                 if not attendance:
                     return False, "Attendance record not found."
@@ -247,7 +1030,165 @@ class DatabaseManager:
         except Exception as e:
             return False, f"Failed to delete attendance: {str(e)}"
 
+    def count_device_attendance(self, device_ip, start, end):
+        """Count stored punches from a device between two timestamps, inclusive."""
+        self._connect_once()
+        return (
+            Attendance.select()
+            .where(
+                (Attendance.device_ip == device_ip)
+                & (Attendance.timestamp.between(start, end))
+            )
+            .count()
+        )
+
+    def missing_device_attendance(self, device_ip, punches, start, end):
+        """Return the punches from a device that are not stored.
+
+        Args:
+            device_ip (str): Device the punches were read from.
+            punches (set): (user_id, timestamp) pairs to look for.
+            start (datetime): Oldest punch timestamp.
+            end (datetime): Newest punch timestamp.
+
+        Returns:
+            set: The (user_id, timestamp) pairs with no matching row.
+        """
+        self._connect_once()
+        stored = (
+            Attendance.select(Attendance.user_id, Attendance.timestamp)
+            .where(
+                (Attendance.device_ip == device_ip)
+                & (Attendance.timestamp.between(start, end))
+            )
+            .tuples()
+        )
+        return set(punches).difference(stored)
+
+    def get_attendance_page(
+        self,
+        after=None,
+        limit=100,
+        user_id=None,
+        device_ip=None,
+        start=None,
+        end=None,
+        synced=None,
+    ):
+        """Return one page of attendance in (user_id, timestamp, id) order.
+
+        Keyset pagination over the (user_id, timestamp) index, whose entries
+        also carry the row id, so a page is one index range scan with no sort
+        and no OFFSET, however deep into the table it is.
+
+        Args:
+            after (tuple, optional): Cursor returned by the previous page.
+            limit (int): Maximum rows returned (default: 100).
+            user_id (int, optional): Only this user's punches.
+            device_ip (str, optional): Only punches from this device.
+            start (datetime, optional): Only punches at or after this time.
+            end (datetime, optional): Only punches before this time.
+            synced (bool, optional): Only rows with this synced flag.
+
+        Returns:
+            tuple: (rows: list, next_cursor: tuple or None)
+            rows: Dicts of Attendance field values. next_cursor is None once
+            the last page has been returned.
+        """
+        self._connect_once()
+        query = Attendance.select()
+        if after is not None:
+            query = query.where(
+                Tuple(Attendance.user_id, Attendance.timestamp, Attendance.id)
+                > Tuple(*after)
+            )
+        if user_id is not None:
+            query = query.where(Attendance.user_id == user_id)
+        if device_ip is not None:
+            query = query.where(Attendance.device_ip == device_ip)
+        if start is not None:
+            query = query.where(Attendance.timestamp >= start)
+        if end is not None:
+            query = query.where(Attendance.timestamp < end)
+        if synced is not None:
+            query = query.where(Attendance.synced == synced)
+        rows = list(
+            query.order_by(Attendance.user_id, Attendance.timestamp, Attendance.id)
+            .limit(limit)
+            .dicts()
+        )
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = (last["user_id"], last["timestamp"], last["id"])
+        return rows, next_cursor
+
+    def iter_attendance(self, batch_size=1000, **filters):
+        """Stream attendance in (user_id, timestamp, id) order, a page at a time.
+
+        Only one page is held in memory, however large the table.
+
+        Args:
+            batch_size (int): Rows fetched per query (default: 1000).
+            **filters: user_id, device_ip, start, end and synced, see
+                `get_attendance_page`.
+
+        Yields:
+            dict: One row of Attendance field values.
+        """
+        cursor = None
+        while True:
+            rows, cursor = self.get_attendance_page(cursor, batch_size, **filters)
+            yield from rows
+            if cursor is None:
+                return
+
+    def get_unsynced_attendance(self, after_id=None, limit=500):
+        """Return attendance rows not yet pushed by the outbox, in id order.
+
+        Served by the partial index on unsynced rows, so the cost follows the
+        backlog rather than the table size.
+
+        Args:
+            after_id (int, optional): Only rows with a greater id.
+            limit (int): Maximum rows returned (default: 500).
+
+        Returns:
+            list: Dicts of Attendance field values.
+        """
+        self._connect_once()
+        # A literal 0, not a bound parameter, so SQLite can match the index
+        query = Attendance.select().where(Attendance.synced == SQL("0"))
+        if after_id is not None:
+            query = query.where(Attendance.id > after_id)
+        return list(query.order_by(Attendance.id).limit(limit).dicts())
+
+    def mark_attendance_synced(self, attendance_ids, chunk_size=500):
+        """Flag attendance rows as pushed, with one UPDATE per chunk of ids.
+
+        Args:
+            attendance_ids (list): Attendance primary keys.
+            chunk_size (int): Ids per statement (default: 500).
+
+        Returns:
+            tuple: (success: bool, updated: int or message: str)
+        """
+        updated = 0
+        now = datetime.now()
+        try:
+            with self._atomic():
+                for batch in chunked(attendance_ids, chunk_size):
+                    updated += (
+                        Attendance.update(synced=True, updated_at=now)
+                        .where(Attendance.id.in_(batch))
+                        .execute()
+                    )
+            return True, updated
+        except Exception as e:
+            return False, f"Failed to mark attendance synced: {str(e)}"
+
     def get_attendance(self):
+        self._connect_once()
         try:
             attendance = Attendance.select().dicts()
             return list(attendance)
@@ -255,5 +1196,6 @@ class DatabaseManager:
             return []
 
     def close(self):
+        """Hand the calling thread's connection back to the pool."""
         if not self.database.is_closed():
             self.database.close()
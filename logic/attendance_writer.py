@@ -0,0 +1,64 @@
+import time
+
+
+class AttendanceBatchWriter:
+    """Buffers attendance rows and writes them to the database in batches."""
+
+    def __init__(self, db_manager, batch_size=100, flush_interval=0.5):
+        """Initialize the writer.
+
+        Args:
+            db_manager (DatabaseManager): Database manager used for the inserts.
+            batch_size (int): Rows buffered before a flush is forced (default: 100).
+            flush_interval (float): Seconds the oldest buffered row may wait
+                before the buffer is due for a flush (default: 0.5).
+        """
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.inserted = 0
+        self._rows = []
+        self._oldest_at = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, row):
+        """Buffer one attendance row, flushing when the batch is full.
+
+        Args:
+            row (dict): Attendance field values.
+
+        Returns:
+            tuple: (success: bool, inserted: int or message: str) of the flush,
+            or (True, 0) if the row was only buffered.
+        """
+        if not self._rows:
+            self._oldest_at = time.monotonic()
+        self._rows.append(row)
+        if len(self._rows) >= self.batch_size:
+            return self.flush()
+        return True, 0
+
+    def due(self):
+        """Return True if the oldest buffered row has waited `flush_interval`."""
+        return bool(self._rows) and (
+            time.monotonic() - self._oldest_at >= self.flush_interval
+        )
+
+    def flush(self):
+        """Hand all buffered rows to the database writer thread and wait for them.
+
+        Rows stay buffered if the write fails, so the next flush retries them.
+
+        Returns:
+            tuple: (success: bool, inserted: int or message: str)
+        """
+        if not self._rows:
+            return True, 0
+        success, result = self.db_manager.ingest_attendance(self._rows)
+        if success:
+            self.inserted += result
+            self._rows = []
+            self._oldest_at = None
+        return success, result
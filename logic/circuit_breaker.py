@@ -0,0 +1,83 @@
+import threading
+import time
+
+
+class DeviceCircuitBreaker:
+    """Tracks connection failures per device and skips devices that keep failing.
+
+    After `failure_threshold` consecutive failures a device's circuit opens for
+    `base_delay` seconds, doubling with every further failure up to
+    `max_delay`. Once the delay has passed the circuit is half-open: a single
+    attempt is let through, and its outcome either closes the circuit or opens
+    it again for longer.
+    """
+
+    def __init__(self, failure_threshold=2, base_delay=15, max_delay=900):
+        """Initialize the breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+                (default: 2).
+            base_delay (float): Seconds the circuit stays open the first time
+                (default: 15).
+            max_delay (float): Upper bound for the open period (default: 900).
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._states = {}  # (ip, port) -> {"failures", "open_until", "trial"}
+        self._lock = threading.Lock()
+
+    def retry_in(self, ip, port):
+        """Return the seconds until the device may be tried again, 0 if now."""
+        with self._lock:
+            state = self._states.get((ip, port))
+            if not state:
+                return 0
+            return max(0, state["open_until"] - time.monotonic())
+
+    def is_open(self, ip, port):
+        """Return True if attempts against the device should be skipped for now."""
+        return self.retry_in(ip, port) > 0
+
+    def allow(self, ip, port):
+        """Claim the right to try the device.
+
+        While the circuit is half-open only one caller is allowed through until
+        its result is recorded.
+
+        Returns:
+            tuple: (allowed: bool, retry_in: float)
+        """
+        with self._lock:
+            state = self._states.get((ip, port))
+            if not state or state["failures"] < self.failure_threshold:
+                return True, 0
+            remaining = state["open_until"] - time.monotonic()
+            if remaining > 0:
+                return False, remaining
+            if state["trial"]:
+                return False, 0
+            state["trial"] = True
+            return True, 0
+
+    def record_success(self, ip, port):
+        """Close the device's circuit."""
+        with self._lock:
+            self._states.pop((ip, port), None)
+
+    def record_failure(self, ip, port):
+        """Count a failure, opening the circuit once the threshold is reached."""
+        with self._lock:
+            state = self._states.setdefault(
+                (ip, port), {"failures": 0, "open_until": 0, "trial": False}
+            )
+            state["failures"] += 1
+            state["trial"] = False
+            excess = state["failures"] - self.failure_threshold
+            if excess >= 0:
+                delay = min(self.max_delay, self.base_delay * 2 ** min(excess, 32))
+                state["open_until"] = time.monotonic() + delay
+
+
+device_breaker = DeviceCircuitBreaker()
@@ -0,0 +1,224 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from logic.circuit_breaker import device_breaker
+from logic.device_control import FingerprintDeviceManager
+
+
+class DeviceConnectionPool:
+    """Process-wide pool of authenticated device sessions.
+
+    A leased session is connected and disabled, exactly like a fresh
+    `FingerprintDeviceManager.connect()`, unless it is leased read-only. On
+    release the device is re-enabled but the session stays open, so the next
+    lease skips the TCP connect, CMD_CONNECT/auth handshake and confirmation
+    voice. Sessions are reused only for the same ip, port and comm password,
+    and are disconnected once idle for `idle_timeout` seconds: many terminals
+    accept a single session, and an idle one would lock other clients out.
+    """
+
+    def __init__(self, idle_timeout=60, max_leases_per_device=1):
+        """Initialize the pool.
+
+        Args:
+            idle_timeout (float): Seconds an unused session is kept open (default: 60).
+            max_leases_per_device (int): Sessions that may be leased against one
+                device at the same time (default: 1).
+        """
+        self.idle_timeout = idle_timeout
+        self.max_leases_per_device = max(1, int(max_leases_per_device))
+        # (ip, port, password) -> [(FingerprintDeviceManager, released_at)]
+        self._idle = {}
+        self._slots = {}  # (ip, port) -> BoundedSemaphore
+        self._lock = threading.Lock()
+        self._reaper = None  # Timer that closes sessions once they expire
+
+    def _slots_for(self, key):
+        with self._lock:
+            if key not in self._slots:
+                self._slots[key] = threading.BoundedSemaphore(
+                    self.max_leases_per_device
+                )
+            return self._slots[key]
+
+    def _close(self, fdm):
+        success, _ = fdm.disconnect()
+        if not success:
+            fdm.is_connect = False
+            fdm.conn = None
+
+    def close_idle(self):
+        """Disconnect sessions that have been idle longer than `idle_timeout`."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, sessions in self._idle.items():
+                expired += [
+                    fdm for fdm, at in sessions if now - at >= self.idle_timeout
+                ]
+                sessions[:] = [
+                    (fdm, at) for fdm, at in sessions if now - at < self.idle_timeout
+                ]
+        for fdm in expired:
+            self._close(fdm)
+
+    def _reap(self):
+        with self._lock:
+            self._reaper = None
+        self.close_idle()
+        self._schedule_reap()
+
+    def _schedule_reap(self):
+        """Run `close_idle` when the oldest idle session expires."""
+        with self._lock:
+            released = [at for idle in self._idle.values() for _, at in idle]
+            if not released or self._reaper is not None:
+                return
+            delay = max(0, min(released) + self.idle_timeout - time.monotonic())
+            self._reaper = threading.Timer(delay, self._reap)
+            self._reaper.daemon = True
+            self._reaper.start()
+
+    def close_all(self):
+        """Disconnect every idle session, e.g. at shutdown."""
+        with self._lock:
+            sessions = [fdm for idle in self._idle.values() for fdm, _ in idle]
+            self._idle.clear()
+            if self._reaper is not None:
+                self._reaper.cancel()
+                self._reaper = None
+        for fdm in sessions:
+            self._close(fdm)
+
+    def acquire(
+        self,
+        ip,
+        port,
+        password=0,
+        db_manager=None,
+        timeout=None,
+        read_only=False,
+        reachable=None,
+        admitted=False,
+    ):
+        """Lease a connected session for the device at ip:port.
+
+        Args:
+            ip (str): Device IP address.
+            port (int): Device port.
+            password (int): Device password (default: 0).
+            db_manager (DatabaseManager, optional): Database manager the session
+                should use while leased.
+            timeout (float, optional): Seconds to wait for a free lease slot;
+                waits indefinitely by default.
+            read_only (bool): Leave the device enabled while leased, see
+                `FingerprintDeviceManager.connect` (default: False).
+            reachable (bool, optional): Known reachability, passed on to
+                `FingerprintDeviceManager.connect` when a new session is opened.
+            admitted (bool): The caller already claimed this attempt with
+                `device_breaker.allow`; the lease records its outcome
+                (default: False).
+
+        Returns:
+            tuple: (success: bool, session: FingerprintDeviceManager or message: str)
+        """
+        key = (ip, port, password)
+        slots = self._slots_for((ip, port))
+        if not slots.acquire(timeout=timeout):
+            if admitted:
+                # Still held by a session that has hung past its deadline
+                device_breaker.record_failure(ip, port)
+            return False, "No free connection to the device."
+
+        self.close_idle()
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                fdm = idle.pop()[0] if idle else None
+            if fdm is None:
+                break
+            # Health check: the session may have been dropped by the device
+            if fdm.is_connected():
+                try:
+                    if not read_only:
+                        fdm.conn.disable_device()
+                    fdm.read_only = read_only
+                    if db_manager is not None:
+                        fdm.db_manager = db_manager
+                    if admitted:
+                        device_breaker.record_success(ip, port)
+                    return True, fdm
+                except Exception:
+                    pass
+            self._close(fdm)
+
+        fdm = FingerprintDeviceManager(
+            ip=ip, port=port, password=password, db_manager=db_manager
+        )
+        success, message = fdm.connect(
+            read_only=read_only, reachable=reachable, admitted=admitted
+        )
+        if not success:
+            slots.release()
+            return False, message
+        return True, fdm
+
+    def release(self, fdm, discard=False):
+        """Return a leased session to the pool.
+
+        Args:
+            fdm (FingerprintDeviceManager): Session obtained from `acquire`.
+            discard (bool): Disconnect instead of keeping the session (default: False).
+        """
+        key = (fdm.ip, fdm.port, fdm.password)
+        try:
+            if not discard and fdm.is_connect and fdm.conn:
+                try:
+                    if not fdm.read_only:
+                        fdm.conn.enable_device()
+                    with self._lock:
+                        self._idle.setdefault(key, []).append((fdm, time.monotonic()))
+                    self._schedule_reap()
+                    return
+                except Exception:
+                    pass
+            self._close(fdm)
+        finally:
+            self._slots_for((fdm.ip, fdm.port)).release()
+
+    @contextmanager
+    def lease(
+        self,
+        ip,
+        port,
+        password=0,
+        db_manager=None,
+        timeout=None,
+        read_only=False,
+        reachable=None,
+        admitted=False,
+    ):
+        """Context manager around `acquire`/`release`.
+
+        Yields:
+            tuple: (success: bool, session: FingerprintDeviceManager or message: str)
+        """
+        success, fdm = self.acquire(
+            ip,
+            port,
+            password=password,
+            db_manager=db_manager,
+            timeout=timeout,
+            read_only=read_only,
+            reachable=reachable,
+            admitted=admitted,
+        )
+        try:
+            yield success, fdm
+        finally:
+            if success:
+                self.release(fdm)
+
+
+connection_pool = DeviceConnectionPool()
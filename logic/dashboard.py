@@ -1,58 +1,69 @@
 from datetime import datetime
 from database_manager import DatabaseManager
-from logic.device_control import FingerprintDeviceManager
+from logic.device_status import DeviceStatusMonitor
+from logic.reachability import DEFAULT_TIMEOUT
+from logic.sync_engine import DeviceSyncEngine
 
 
 class DashboardLogic:
-    def __init__(self, db_manager=None):
+    def __init__(
+        self,
+        db_manager=None,
+        max_workers=8,
+        device_timeout=60,
+        reach_timeout=DEFAULT_TIMEOUT,
+    ):
         self.db_manager = db_manager or DatabaseManager()
+        self.sync_engine = DeviceSyncEngine(
+            self.db_manager,
+            max_workers=max_workers,
+            device_timeout=device_timeout,
+            reach_timeout=reach_timeout,
+        )
+        self.status_monitor = DeviceStatusMonitor(self.db_manager)
+        self.last_sync_report = []
 
-    def sync_data(self):
+    def sync_data(self, progress_callback=None):
         """Sync users and attendance from all devices, return sync timestamp.
 
+        Devices are synced concurrently; the per-device outcome of the run is
+        kept in `last_sync_report` (see `DeviceSyncEngine.sync_device`).
+
+        Args:
+            progress_callback (callable, optional): Receives progress events as
+                the devices are synced, from worker threads; a `SyncProgress`
+                turns them into a per-device summary.
+
         Returns:
-            str: Timestamp of the sync in 'YYYY-MM-DD HH:MM:SS' format.
+            str: Timestamp of the sync in 'YYYY-MM-DD HH:MM:SS' format, or
+            False if no device could be reached.
         """
-        devices = self.db_manager.get_devices()
-
-        cant_connected_devices = 0
-        for device in devices:
-            fdm = FingerprintDeviceManager(
-                ip=device["ip"], port=device["port"], db_manager=self.db_manager
+        # Called from a background thread; its connection goes back to the pool
+        with self.db_manager.connection():
+            devices = self.db_manager.get_devices()
+            self.last_sync_report = self.sync_engine.run(devices, progress_callback)
+        for report in self.last_sync_report:
+            self.status_monitor.mark(
+                report["ip"], report["port"], report["success"], report["message"]
             )
-            success, message = fdm.connect()
-            if not success:
-                cant_connected_devices += 1
-                continue
-
-            # Pull users
-            fdm.pull_users_to_db()
 
-            # Pull attendance
-            fdm.pull_attendance_to_db()
-
-            fdm.disconnect()
-        if cant_connected_devices == len(devices):
+        if not any(report["success"] for report in self.last_sync_report):
             return False
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     def get_card_data(self):
-        """Return data for dashboard cards."""
+        """Return data for dashboard cards.
+
+        Device status comes from the `status_monitor` cache, which is refreshed
+        in the background when stale, so building the cards never waits on a
+        device.
+        """
         devices = self.db_manager.get_devices()
         total_devices = len(devices)
-        connected_devices = 0
-
-        for device in devices:
-            fdm = FingerprintDeviceManager(
-                ip=device["ip"], port=device["port"], db_manager=self.db_manager
-            )
-            success, _ = fdm.connect()
-            if success and fdm.is_connected():
-                connected_devices += 1
-            fdm.disconnect()
+        statuses = self.status_monitor.get_statuses(devices)
+        connected_devices = sum(1 for online in statuses.values() if online)
 
-        users = self.db_manager.get_users()
-        total_users = len(users)
+        total_users = self.db_manager.count_users()
 
         return [
             {
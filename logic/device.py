@@ -8,7 +8,12 @@ class DeviceManagementLogic:
     def get_devices(self):
         return self.db_manager.get_devices()
 
-    def validate_and_format(self, name, device_model, serial_number, ip, port):
+    def get_device(self, device_id):
+        return self.db_manager.get_device(device_id)
+
+    def validate_and_format(
+        self, name, device_model, serial_number, ip, port, clear_after_ingest=False
+    ):
         if not all([name, device_model, serial_number, ip, port]):
             return False, "All fields are required."
 
@@ -25,6 +30,7 @@ class DeviceManagementLogic:
             "serial_number": serial_number,
             "ip": ip,
             "port": port,
+            "clear_after_ingest": clear_after_ingest in (True, "Yes"),
         }
 
     def add_device(self, **kwargs):
@@ -1,6 +1,33 @@
+import threading
+from contextlib import contextmanager
+from itertools import repeat
+
 from zk import ZK, const
 from database_manager import DatabaseManager
 from datetime import datetime
+from logic.attendance_writer import AttendanceBatchWriter
+from logic.circuit_breaker import device_breaker
+from logic.reachability import is_reachable
+from logic.zk_decoder import (
+    attendance_record_size,
+    decode_user_columns,
+    iter_attendance_columns,
+)
+
+# Column order of the attendance rows built by pull_attendance_to_db
+ATTENDANCE_FIELDS = (
+    "user_id",
+    "timestamp",
+    "status",
+    "device_ip",
+    "synced",
+    "created_at",
+    "updated_at",
+)
+
+
+def _no_progress(event, **data):
+    """Progress function used when the caller doesn't follow the pull."""
 
 
 class FingerprintDeviceManager:
@@ -25,10 +52,13 @@ class FingerprintDeviceManager:
             timeout=5,
             password=password,
             force_udp=False,
-            ommit_ping=False,
+            # Reachability is checked in-process by connect(), not by spawning ping
+            ommit_ping=True,
         )
         self.conn = None
         self.is_connect = False
+        self.read_only = False
+        self._stop_live = threading.Event()
 
     def is_connected(self):
         """Check if the device is connected.
@@ -46,25 +76,93 @@ class FingerprintDeviceManager:
             self.is_connect = False
             return False
 
-    def connect(self):
+    def connect(self, read_only=False, reachable=None, admitted=False):
         """Connect to the device and disable it for operations.
 
+        Args:
+            read_only (bool): Open a read-only session that leaves the device
+                enabled and skips the confirmation voice, for pulls and probes.
+                Writes on such a session disable the device only while they
+                run (default: False).
+            reachable (bool, optional): Result of a reachability check the
+                caller already ran, e.g. `check_reachable` over all devices.
+                Checked with `is_reachable` when omitted.
+            admitted (bool): The caller already claimed this attempt with
+                `device_breaker.allow`; its outcome is still recorded here
+                (default: False).
+
         Returns:
             tuple: (success: bool, message: str)
         """
         if self.is_connect:
             return True, "Already connected."
+        if not admitted:
+            allowed, retry_in = device_breaker.allow(self.ip, self.port)
+            if not allowed:
+                return False, (
+                    f"Skipped: device keeps failing, next attempt in {retry_in:.0f}s."
+                )
+        if reachable is None:
+            reachable = is_reachable(self.ip, self.port)
+        if not reachable:
+            device_breaker.record_failure(self.ip, self.port)
+            return False, f"Failed to connect: can't reach device ({self.ip})"
         try:
             self.conn = self.zk.connect()
-            self.conn.disable_device()  # Disable device to prevent user activity
+            self.read_only = read_only
+            if not read_only:
+                self.conn.disable_device()  # Disable device to prevent user activity
             self.is_connect = True
-            self.conn.test_voice(index=0)  # Play 'Thank You' to confirm connection
+            if not read_only:
+                self.conn.test_voice(index=0)  # Play 'Thank You' to confirm connection
+            device_breaker.record_success(self.ip, self.port)
             return True, "Connected successfully."
         except Exception as e:
+            device_breaker.record_failure(self.ip, self.port)
             self.is_connect = False
             self.conn = None
             return False, f"Failed to connect: {str(e)}"
 
+    def probe(self, timeout=1, admitted=False):
+        """Check that the device answers, without a full session.
+
+        Checks TCP reachability and performs only the CMD_CONNECT/auth handshake
+        on a throwaway session; the device is never disabled and plays no sound.
+
+        Args:
+            timeout (float): Seconds allowed for each network step (default: 1).
+            admitted (bool): The caller already claimed this attempt with
+                `device_breaker.allow`; its outcome is still recorded here
+                (default: False).
+
+        Returns:
+            tuple: (online: bool, message: str)
+        """
+        if not admitted:
+            allowed, retry_in = device_breaker.allow(self.ip, self.port)
+            if not allowed:
+                return False, (
+                    f"Device is offline: keeps failing, next probe in {retry_in:.0f}s."
+                )
+        if not is_reachable(self.ip, self.port, timeout):
+            device_breaker.record_failure(self.ip, self.port)
+            return False, f"Device is offline: can't reach device ({self.ip})"
+        try:
+            zk = ZK(
+                self.ip,
+                port=self.port,
+                timeout=timeout,
+                password=self.password,
+                force_udp=False,
+                ommit_ping=True,
+            )
+            zk.connect().disconnect()
+            device_breaker.record_success(self.ip, self.port)
+            return True, "Device is online."
+        except Exception as e:
+            device_breaker.record_failure(self.ip, self.port)
+            return False, f"Device is offline: {str(e)}"
+
     def disconnect(self):
         """Disconnect from the device and re-enable it.
 
@@ -74,7 +172,8 @@ class FingerprintDeviceManager:
         if not self.is_connect or not self.conn:
             return True, "Not connected."
         try:
-            self.conn.enable_device()  # Re-enable device
+            if not self.read_only:
+                self.conn.enable_device()  # Re-enable device
             self.conn.disconnect()
             self.is_connect = False
             self.conn = None
@@ -82,6 +181,18 @@ class FingerprintDeviceManager:
         except Exception as e:
             return False, f"Failed to disconnect: {str(e)}"
 
+    @contextmanager
+    def _exclusive(self):
+        """Keep the device disabled while a write runs on a read-only session."""
+        if not self.read_only:
+            yield
+            return
+        self.conn.disable_device()
+        try:
+            yield
+        finally:
+            self.conn.enable_device()
+
     def create_user(self, uid, name, privilege, password, user_id, group_id="", card=0):
         """Create a new user on the device.
 
@@ -103,15 +214,16 @@ class FingerprintDeviceManager:
             privilege_val = (
                 const.USER_ADMIN if privilege.lower() == "admin" else const.USER_DEFAULT
             )
-            self.conn.set_user(
-                uid=uid,
-                name=name,
-                privilege=privilege_val,
-                password=password,
-                group_id=group_id,
-                user_id=str(user_id),
-                card=card,
-            )
+            with self._exclusive():
+                self.conn.set_user(
+                    uid=uid,
+                    name=name,
+                    privilege=privilege_val,
+                    password=password,
+                    group_id=group_id,
+                    user_id=str(user_id),
+                    card=card,
+                )
             return True, "User created successfully."
         except Exception as e:
             return False, f"Failed to create user: {str(e)}"
@@ -193,7 +305,8 @@ class FingerprintDeviceManager:
                 "card": card if card is not None else user.card,
             }
 
-            self.conn.set_user(**updated_data)
+            with self._exclusive():
+                self.conn.set_user(**updated_data)
             return True, "User updated successfully."
         except Exception as e:
             return False, f"Failed to update user: {str(e)}"
@@ -213,108 +326,397 @@ class FingerprintDeviceManager:
         if not uid and not user_id:
             return False, "UID or user_id required."
         try:
-            self.conn.delete_user(uid=uid, user_id=user_id)
+            with self._exclusive():
+                self.conn.delete_user(uid=uid, user_id=user_id)
             return True, "User deleted successfully."
         except Exception as e:
             return False, f"Failed to delete user: {str(e)}"
 
-    def pull_users_to_db(self):
+    def pull_users_to_db(self, progress=None):
         """Pull all users from the device and insert/update them in the User table.
 
+        Args:
+            progress (callable, optional): progress(event, **data), see
+                `sync_progress.device_progress`; receives users_pulled.
+
         Returns:
             tuple: (success: bool, message: str)
         """
         if not self.is_connected():
             return False, "Device not connected."
+        progress = progress or _no_progress
         try:
-            success, users, message = self.get_users()
-            if not success:
-                return False, message
-
-            device = next(
-                (d for d in self.db_manager.get_devices() if d["ip"] == self.ip), None
+            # Decode the raw user buffer column-wise; pyzk's get_users walks it
+            # record by record and rescans the list for every free id.
+            self.conn.read_sizes()
+            user_buffer = b""
+            if self.conn.users:
+                user_buffer, _ = self.conn.read_with_buffer(
+                    const.CMD_USERTEMP_RRQ, const.FCT_USER
+                )
+            users = decode_user_columns(
+                user_buffer, self.conn.users, self.conn.encoding
             )
+
+            device = self.db_manager.get_device_by_address(self.ip, self.port)
             device_id = device["id"] if device else None
 
-            for user in users:
-                user_data = {
-                    "name": user["name"],
-                    "privilege": user["privilege"],
-                    "password": user["password"],
-                    "user_id": int(user["user_id"]),
-                    "group_id": int(user["group_id"]) if user["group_id"] else 0,
+            users_data = [
+                {
+                    "name": name,
+                    "privilege": "Admin" if privilege == const.USER_ADMIN else "User",
+                    "password": password,
+                    "user_id": int(user_id),
+                    "group_id": int(group_id) if group_id else 0,
                     "device_id": device_id,
-                    "created_at": datetime.now(),
-                    "updated_at": datetime.now(),
                 }
-                # Check if user exists by user_id
-                existing_user = next(
-                    (
-                        u
-                        for u in self.db_manager.get_users()
-                        if u["user_id"] == user_data["user_id"]
-                    ),
-                    None,
+                for name, privilege, password, user_id, group_id in zip(
+                    users["name"],
+                    users["privilege"],
+                    users["password"],
+                    users["user_id"],
+                    users["group_id"],
                 )
-                if existing_user:
-                    # Update existing user
-                    self.db_manager.update_user(existing_user["id"], user_data)
-                else:
-                    # Insert new user
-                    self.db_manager.insert_user(user_data)
-
-            return True, f"{len(users)} users pulled and synced to database."
+            ]
+            success, counts = self.db_manager.bulk_upsert_users(users_data)
+            if not success:
+                progress("users_pulled", success=False, users=None, message=counts)
+                return False, counts
+
+            message = (
+                f"{len(users_data)} users pulled and synced to database "
+                f"({counts['inserted']} inserted, {counts['updated']} updated, "
+                f"{counts['unchanged']} unchanged)."
+            )
+            progress(
+                "users_pulled", success=True, users=len(users_data), message=message
+            )
+            return True, message
         except Exception as e:
-            return False, f"Failed to pull users: {str(e)}"
+            message = f"Failed to pull users: {str(e)}"
+            progress("users_pulled", success=False, users=None, message=message)
+            return False, message
+
+    def _attendance_row(self, att):
+        """Map a pyzk Attendance record to Attendance table field values."""
+        # Map status (pyzk uses integers: 0=check-in, 1=check-out, etc.)
+        status_map = {0: "in", 1: "out"}
+        return {
+            "user_id": int(att.user_id),
+            "timestamp": att.timestamp,
+            "status": status_map.get(att.status),  # Only store 'in' or 'out'
+            "device_ip": self.ip,
+            "synced": False,
+            "created_at": datetime.now(),
+        }
+
+    def pull_attendance_to_db(self, full=False, clear_after_ingest=None, progress=None):
+        """Pull new attendance records from the device into the Attendance table.
+
+        The download is skipped entirely when the device log size reported by
+        `read_sizes` has not changed since the last pull (see
+        `Device.last_record_count`). Otherwise every record in the log is
+        decoded and the unique index drops the ones already stored; punch
+        timestamps are not used to skip records, since device clock changes
+        and out-of-order logs make them unreliable.
+
+        In retention mode the whole log is pulled with the device disabled and
+        then cleared from the device once every punch is verified as stored
+        (see `_clear_ingested_attendance`).
 
-    def pull_attendance_to_db(self):
-        """Pull attendance records from the device and insert them into the Attendance table.
+        Args:
+            full (bool): Pull even if the log size has not changed
+                (default: False).
+            clear_after_ingest (bool, optional): Clear the device log after a
+                verified pull. Defaults to the device's `clear_after_ingest`
+                setting.
+            progress (callable, optional): progress(event, **data), see
+                `sync_progress.device_progress`; receives attendance_decoded
+                and attendance_inserted.
 
         Returns:
             tuple: (success: bool, message: str)
         """
         if not self.is_connected():
             return False, "Device not connected."
+        progress = progress or _no_progress
         try:
-            attendances = self.conn.get_attendance()
-            if not attendances:
-                return True, "No new attendance records found."
-
-            count = 0
-            for att in attendances:
-                # Map status (pyzk uses integers: 0=check-in, 1=check-out, etc.)
-                status_map = {0: "in", 1: "out"}
-                status = status_map.get(att.status, None)  # Only store 'in' or 'out'
-
-                attendance_data = {
-                    "user_id": int(att.user_id),
-                    "timestamp": att.timestamp,
-                    "status": status,
-                    "device_ip": self.ip,
-                    "synced": False,
-                    "created_at": datetime.now(),
-                }
-
-                # Check if attendance record exists (by user_id and timestamp)
-                existing_att = next(
-                    (
-                        a
-                        for a in self.db_manager.get_attendance()
-                        if a["user_id"] == attendance_data["user_id"]
-                        and a["timestamp"] == attendance_data["timestamp"]
-                    ),
-                    None,
+            device = self.db_manager.get_device_by_address(self.ip, self.port)
+            if clear_after_ingest is None:
+                clear_after_ingest = bool(device and device["clear_after_ingest"])
+            # A clear that never completed may or may not have wiped the log, so
+            # its size says nothing about what is stored; re-read all of it.
+            pending = self.db_manager.get_pending_attendance_clears(self.ip, self.port)
+            if not clear_after_ingest and not pending:
+                success, message, _ = self._ingest_attendance(
+                    device, full, progress=progress
                 )
-                if not existing_att:
-                    success, message = self.db_manager.insert_attendance(
-                        attendance_data
-                    )
-                    if success:
-                        count += 1
-
-            # Optionally clear attendance records from device
-            # self.conn.clear_attendance()
+                return success, message
 
-            return True, f"{count} new attendance records inserted."
+            # Disabled, the device takes no punches between the pull and the clear
+            with self._exclusive():
+                success, message, batch = self._ingest_attendance(
+                    device, full=True, verify=True, progress=progress
+                )
+                if not success:
+                    return False, message
+                for entry in pending:
+                    self.db_manager.finish_attendance_clear(entry["id"], "recovered")
+                if not clear_after_ingest or not batch["record_count"]:
+                    return True, message
+                _, clear_message = self._clear_ingested_attendance(device, batch)
+                return True, f"{message} {clear_message}"
         except Exception as e:
             return False, f"Failed to pull attendance: {str(e)}"
+
+    def _ingest_attendance(self, device, full, verify=False, progress=_no_progress):
+        """Read the device log and insert the records not yet stored.
+
+        Args:
+            device (dict): Device row, or None for an unregistered device.
+            full (bool): Pull even if the log size has not changed.
+            verify (bool): Collect the distinct punches read, for
+                `_clear_ingested_attendance` (default: False).
+            progress (callable): progress(event, **data), see
+                `sync_progress.device_progress`.
+
+        Returns:
+            tuple: (success: bool, message: str, batch: dict or None)
+            batch: Dict with keys record_count (device log size), punches
+            (distinct (user_id, timestamp) pairs, when verifying), first and last
+            (oldest and newest punch read).
+        """
+        self.conn.read_sizes()
+        record_count = self.conn.records
+        batch = {"record_count": record_count, "punches": set()}
+        batch["first"] = batch["last"] = None
+
+        if device and not full and record_count == device["last_record_count"]:
+            return True, "No new attendance records found.", batch
+
+        attendance_buffer = b""
+        if record_count:
+            attendance_buffer, _ = self.conn.read_with_buffer(const.CMD_ATTLOG_RRQ)
+        uid_map = None
+        if attendance_record_size(attendance_buffer, record_count) in (8, 16):
+            # Older formats only carry one of uid/user_id
+            uid_map = {user.uid: user.user_id for user in self.conn.get_users()}
+
+        status_map = {0: "in", 1: "out"}
+        created_at = datetime.now()
+
+        def rows():
+            decoded = 0
+            for columns in iter_attendance_columns(
+                attendance_buffer, record_count, uid_map
+            ):
+                user_ids = list(map(int, columns["user_id"]))
+                decoded += len(user_ids)
+                progress("attendance_decoded", rows=decoded)
+                timestamps = columns["timestamp"]
+                chunk = zip(
+                    user_ids,
+                    timestamps,
+                    map(status_map.get, columns["status"]),
+                    repeat(self.ip),
+                    repeat(False),
+                    repeat(created_at),
+                    repeat(created_at),
+                )
+                if verify:
+                    batch["punches"].update(zip(user_ids, timestamps))
+                if timestamps:
+                    oldest, newest = min(timestamps), max(timestamps)
+                    if batch["first"] is None or oldest < batch["first"]:
+                        batch["first"] = oldest
+                    if batch["last"] is None or newest > batch["last"]:
+                        batch["last"] = newest
+                yield from chunk
+
+        # Decoded column-wise a chunk at a time and handed to the writer
+        # thread as tuples, so memory stays flat however large the device log
+        # is and decoding overlaps with the inserts. Records already stored
+        # are skipped by the unique index.
+        success, count = self.db_manager.ingest_attendance(
+            rows(),
+            fields=ATTENDANCE_FIELDS,
+            on_committed=lambda inserted: progress(
+                "attendance_inserted", rows=inserted
+            ),
+        )
+        if not success:
+            return False, count, None
+
+        if device:
+            last_attendance_at = max(
+                filter(None, (batch["last"], device["last_attendance_at"])),
+                default=None,
+            )
+            self.db_manager.update_device_checkpoint(
+                device["id"], record_count, last_attendance_at
+            )
+
+        if not count:
+            return True, "No new attendance records found.", batch
+        return True, f"{count} new attendance records inserted.", batch
+
+    def _clear_ingested_attendance(self, device, batch):
+        """Clear the device log after verifying that a full pull is stored.
+
+        The device must still report the log size that was pulled, and every
+        distinct punch read from it must be found in the database once it has
+        been synced to disk.
+        The clear is journalled before it is sent; if it is interrupted the
+        pending entry makes the next pull re-read the whole log rather than
+        trust its size, so no punch is lost and the unique index keeps
+        re-read ones from being duplicated.
+
+        Args:
+            device (dict): Device row, or None for an unregistered device.
+            batch (dict): Batch returned by `_ingest_attendance` with full=True.
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        self.conn.read_sizes()
+        if self.conn.records != batch["record_count"]:
+            return False, "Device log changed during the pull; not cleared."
+        synced, message = self.db_manager.sync()
+        if not synced:
+            return False, f"{message} Device log not cleared."
+        # Look each punch up, rather than count rows: older punches stored
+        # from this device in the same period would make a count pass
+        missing = self.db_manager.missing_device_attendance(
+            self.ip, batch["punches"], batch["first"], batch["last"]
+        )
+        if missing:
+            return False, (
+                f"{len(missing)} of {len(batch['punches'])} punches not found in "
+                "the database; device log not cleared."
+            )
+
+        success, clear_id = self.db_manager.start_attendance_clear(
+            device["id"] if device else None,
+            self.ip,
+            self.port,
+            batch["record_count"],
+            batch["last"],
+        )
+        if not success:
+            return False, clear_id
+        if not self.conn.clear_attendance():
+            return False, "Device refused to clear its log."
+        self.db_manager.finish_attendance_clear(clear_id, "cleared")
+        return True, f"Device log cleared ({batch['record_count']} records)."
+
+    def live_capture_to_db(
+        self, batch_size=100, flush_interval=0.5, reconnect_delay=5, stop_event=None
+    ):
+        """Stream punches from the device into the Attendance table until stopped.
+
+        Holds a connection open and consumes pyzk's `live_capture()` events.
+        Punches are buffered by an `AttendanceBatchWriter` and flushed when
+        `batch_size` rows are waiting or the oldest has waited `flush_interval`
+        seconds. When the stream drops, the connection is re-established after
+        `reconnect_delay` seconds and the punches missed meanwhile are caught up
+        with `pull_attendance_to_db`. Blocks the calling thread; call
+        `stop_live_capture` (or set `stop_event`) from another thread to stop.
+        A stop requested before the capture starts is honoured.
+
+        When a session ends, the device checkpoint is moved past the captured
+        punches if they account for all the log grew by, so the next pull
+        doesn't read them again.
+
+        Args:
+            batch_size (int): Rows per database write (default: 100).
+            flush_interval (float): Maximum seconds a punch waits before it is
+                written (default: 0.5).
+            reconnect_delay (float): Seconds between reconnect attempts (default: 5).
+            stop_event (threading.Event, optional): Event that ends the capture.
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        if stop_event is not None:
+            self._stop_live = stop_event
+        # Runs on its own thread for hours; the connection is returned at the end
+        with self.db_manager.connection():
+            writer = AttendanceBatchWriter(self.db_manager, batch_size, flush_interval)
+
+            while not self._stop_live.is_set():
+                success, message = self.connect(read_only=True)
+                if not success:
+                    self._stop_live.wait(reconnect_delay)
+                    continue
+                # Punches captured since the pull checkpoint was last set
+                captured, newest = None, None
+                try:
+                    pulled, _ = self.pull_attendance_to_db()
+                    if pulled:
+                        captured = 0
+                    for att in self.conn.live_capture(new_timeout=flush_interval):
+                        if att is not None:
+                            writer.add(self._attendance_row(att))
+                            if captured is not None:
+                                captured += 1
+                                newest = max(filter(None, (newest, att.timestamp)))
+                        if writer.due():
+                            writer.flush()
+                        if self._stop_live.is_set():
+                            self.conn.end_live_capture = True
+                except Exception as e:
+                    print(f"Live capture from {self.ip} dropped: {str(e)}")
+                finally:
+                    flushed, _ = writer.flush()
+                    if flushed and captured:
+                        self._checkpoint_live_capture(captured, newest)
+                    success, _ = self.disconnect()
+                    if not success:
+                        # The socket is already gone; start the next attempt afresh
+                        self.is_connect = False
+                        self.conn = None
+                if not self._stop_live.is_set():
+                    self._stop_live.wait(reconnect_delay)
+
+            writer.flush()
+        # The stop was honoured; the next capture starts afresh, and never
+        # with the caller's event
+        if stop_event is None:
+            self._stop_live.clear()
+        else:
+            self._stop_live = threading.Event()
+        return True, f"Live capture stopped, {writer.inserted} records inserted."
+
+    def _checkpoint_live_capture(self, captured, newest):
+        """Move the pull checkpoint past punches stored by live capture.
+
+        Only done when the device log grew by exactly the punches captured
+        since the checkpoint was set; a punch the stream missed leaves the
+        checkpoint alone, so the next pull reads it.
+
+        Args:
+            captured (int): Punches stored since the checkpoint was set.
+            newest (datetime): Newest of those punches.
+        """
+        device = self.db_manager.get_device_by_address(self.ip, self.port)
+        if not device:
+            return
+        try:
+            self.conn.read_sizes()
+        except Exception:
+            # The stream dropped; the next pull reads the log instead
+            return
+        if self.conn.records != device["last_record_count"] + captured:
+            return
+        last_attendance_at = max(
+            filter(None, (newest, device["last_attendance_at"])), default=None
+        )
+        self.db_manager.update_device_checkpoint(
+            device["id"], self.conn.records, last_attendance_at
+        )
+
+    def stop_live_capture(self):
+        """Ask a running `live_capture_to_db` to flush and return."""
+        self._stop_live.set()
+        if self.conn:
+            self.conn.end_live_capture = True
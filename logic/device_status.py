@@ -0,0 +1,134 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from logic.circuit_breaker import device_breaker
+from logic.device_control import FingerprintDeviceManager
+from logic.reachability import check_reachable
+
+
+class DeviceStatusMonitor:
+    """Caches device reachability, refreshed by short parallel probes."""
+
+    def __init__(self, db_manager, ttl=30, probe_timeout=1, max_workers=16):
+        """Initialize the monitor.
+
+        Args:
+            db_manager (DatabaseManager): Database manager handed to the probes.
+            ttl (float): Seconds a cached status stays fresh (default: 30).
+            probe_timeout (float): Seconds allowed per probe step (default: 1).
+            max_workers (int): Maximum number of devices probed at once (default: 16).
+        """
+        self.db_manager = db_manager
+        self.ttl = ttl
+        self.probe_timeout = probe_timeout
+        self.max_workers = max(1, int(max_workers))
+        self._statuses = {}  # (ip, port) -> {"online", "message", "checked_at"}
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def mark(self, ip, port, online, message=""):
+        """Record a device status observed elsewhere, e.g. by a sync."""
+        with self._lock:
+            self._statuses[(ip, port)] = {
+                "online": online,
+                "message": message,
+                "checked_at": time.monotonic(),
+            }
+
+    def _probe(self, device):
+        fdm = FingerprintDeviceManager(
+            ip=device["ip"], port=device["port"], db_manager=self.db_manager
+        )
+        online, message = fdm.probe(timeout=self.probe_timeout, admitted=True)
+        self.mark(device["ip"], device["port"], online, message)
+
+    def refresh(self, devices):
+        """Probe all devices in parallel and update the cache. Blocks until done.
+
+        Devices whose circuit is open are marked offline without being
+        touched, and a recovering device already being retried elsewhere is
+        left as it is. One concurrent reachability check covers the rest;
+        only the ones that accept a connection go on to the handshake probe.
+
+        Args:
+            devices (list): Device rows as returned by `DatabaseManager.get_devices`.
+        """
+        if not devices:
+            return
+        # Devices that keep failing are left alone until their next window
+        candidates = []
+        for device in devices:
+            allowed, retry_in = device_breaker.allow(device["ip"], device["port"])
+            if allowed:
+                candidates.append(device)
+            elif retry_in:
+                self.mark(device["ip"], device["port"], False, "Device keeps failing.")
+
+        reachability = check_reachable(
+            ((d["ip"], d["port"]) for d in candidates), self.probe_timeout
+        )
+        reachable = []
+        for device in candidates:
+            if reachability[(device["ip"], device["port"])]:
+                reachable.append(device)
+                continue
+            device_breaker.record_failure(device["ip"], device["port"])
+            self.mark(
+                device["ip"],
+                device["port"],
+                False,
+                f"Device is offline: can't reach device ({device['ip']})",
+            )
+        if not reachable:
+            return
+        workers = min(self.max_workers, len(reachable))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="device-probe"
+        ) as executor:
+            list(executor.map(self._probe, reachable))
+
+    def _refresh_in_background(self, devices):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh(devices)
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_statuses(self, devices, refresh=True):
+        """Return cached statuses without touching the devices.
+
+        Args:
+            devices (list): Device rows as returned by `DatabaseManager.get_devices`.
+            refresh (bool): Start a background probe of the devices whose status
+                is missing or older than `ttl` (default: True).
+
+        Returns:
+            dict: (ip, port) -> bool, or None while a device has never been probed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = {
+                (d["ip"], d["port"]): self._statuses.get((d["ip"], d["port"]))
+                for d in devices
+            }
+        stale = [
+            d
+            for d in devices
+            if cached[(d["ip"], d["port"])] is None
+            or now - cached[(d["ip"], d["port"])]["checked_at"] >= self.ttl
+        ]
+        if refresh and stale:
+            self._refresh_in_background(stale)
+        return {
+            address: status["online"] if status else None
+            for address, status in cached.items()
+        }
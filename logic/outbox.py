@@ -0,0 +1,223 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+# Environment variables configuring the outbox started by the app
+ENDPOINT_VARIABLE = "ATTENDANCE_OUTBOX_URL"
+TOKEN_VARIABLE = "ATTENDANCE_OUTBOX_TOKEN"
+INTERVAL_VARIABLE = "ATTENDANCE_OUTBOX_INTERVAL"
+
+
+class AttendanceOutbox:
+    """Pushes unsynced attendance rows to an HTTP endpoint, oldest first.
+
+    Rows are sent in id order as gzipped JSON batches:
+
+        POST <endpoint>
+        Content-Type: application/json
+        Content-Encoding: gzip
+        Idempotency-Key: <sha256 of the batch's ids>
+
+        {"records": [{"id", "user_id", "timestamp", "status", "device_ip"}, ...]}
+
+    A batch is flagged synced only after a 2xx reply. If the process dies in
+    between, the same rows are sent again with the same Idempotency-Key (and
+    their ids), so the receiver can drop the repeat.
+    """
+
+    # Statuses worth retrying: the receiver may accept the batch later
+    RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        db_manager,
+        endpoint,
+        batch_size=500,
+        headers=None,
+        timeout=10,
+        max_retries=5,
+        backoff=1,
+        max_backoff=60,
+        poll_interval=30,
+    ):
+        """Initialize the outbox.
+
+        Args:
+            db_manager (DatabaseManager): Source of unsynced rows.
+            endpoint (str): URL the batches are POSTed to.
+            batch_size (int): Rows per request (default: 500).
+            headers (dict, optional): Extra request headers, e.g. Authorization.
+            timeout (float): Seconds allowed per request (default: 10).
+            max_retries (int): Retries of a failed batch before giving up on
+                the current push (default: 5).
+            backoff (float): Seconds before the first retry, doubled on every
+                further one (default: 1).
+            max_backoff (float): Upper bound for the retry delay (default: 60).
+            poll_interval (float): Seconds between pushes in `run` (default: 30).
+        """
+        self.db_manager = db_manager
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _payload(rows):
+        records = [
+            {
+                "id": row["id"],
+                "user_id": row["user_id"],
+                "timestamp": row["timestamp"].isoformat(),
+                "status": row["status"],
+                "device_ip": row["device_ip"],
+            }
+            for row in rows
+        ]
+        return gzip.compress(json.dumps({"records": records}).encode())
+
+    @staticmethod
+    def idempotency_key(rows):
+        """Return the key identifying a batch: the same rows give the same key."""
+        ids = ",".join(str(row["id"]) for row in rows)
+        return hashlib.sha256(ids.encode()).hexdigest()
+
+    def _post(self, body, key):
+        """POST one batch.
+
+        Returns:
+            tuple: (success: bool, retry: bool, message: str)
+        """
+        request = urllib.request.Request(
+            self.endpoint,
+            data=body,
+            method="POST",
+            headers={
+                **self.headers,
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+                "Idempotency-Key": key,
+            },
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return True, False, f"HTTP {response.status}"
+        except urllib.error.HTTPError as e:
+            return False, e.code in self.RETRY_STATUSES, f"HTTP {e.code}"
+        except (urllib.error.URLError, OSError) as e:
+            reason = getattr(e, "reason", e)
+            return False, True, f"can't reach {self.endpoint} ({reason})"
+
+    def push_batch(self, after_id=None):
+        """Send the next batch of unsynced rows and flag them synced.
+
+        Retries with exponential backoff on network errors and retryable
+        statuses; other statuses fail at once.
+
+        Args:
+            after_id (int, optional): Only rows with a greater id.
+
+        Returns:
+            tuple: (success: bool, sent: int or message: str, last_id: int or None)
+        """
+        rows = self.db_manager.get_unsynced_attendance(after_id, self.batch_size)
+        if not rows:
+            return True, 0, None
+        body = self._payload(rows)
+        key = self.idempotency_key(rows)
+
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            success, retry, message = self._post(body, key)
+            if success:
+                ids = [row["id"] for row in rows]
+                marked, result = self.db_manager.mark_attendance_synced(ids)
+                if not marked:
+                    return False, result, None
+                return True, len(rows), ids[-1]
+            if not retry or attempt == self.max_retries:
+                break
+            if self._stop.wait(delay):
+                break
+            delay = min(self.max_backoff, delay * 2)
+        return False, f"Failed to push attendance: {message}", None
+
+    def push(self):
+        """Send every unsynced row, batch by batch, until none are left.
+
+        Returns:
+            tuple: (success: bool, message: str)
+        """
+        sent = 0
+        after_id = None
+        while not self._stop.is_set():
+            success, result, after_id = self.push_batch(after_id)
+            if not success:
+                return False, f"{result} ({sent} records pushed before the failure)"
+            if not result:
+                break
+            sent += result
+        return True, f"{sent} attendance records pushed."
+
+    def run(self):
+        """Push every `poll_interval` seconds until `stop` is called."""
+        with self.db_manager.connection():
+            while not self._stop.is_set():
+                success, message = self.push()
+                if not success:
+                    print(f"Outbox: {message}")
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Run the outbox on a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, name="attendance-outbox", daemon=True
+        )
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop `run` and any retry wait in progress.
+
+        Waits up to one request `timeout` for a batch in flight, so a batch
+        the receiver accepted is flagged synced rather than sent again.
+        """
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(self.timeout)
+
+
+def outbox_from_environment(db_manager, environ=None):
+    """Build the outbox configured by environment variables, if any.
+
+    ATTENDANCE_OUTBOX_URL is the endpoint; without it there is no outbox.
+    ATTENDANCE_OUTBOX_TOKEN, if set, is sent as a bearer token, and
+    ATTENDANCE_OUTBOX_INTERVAL sets the seconds between pushes.
+
+    Args:
+        db_manager (DatabaseManager): Source of unsynced rows.
+        environ (dict, optional): Variables to read (default: os.environ).
+
+    Returns:
+        AttendanceOutbox: The outbox, not yet started, or None.
+    """
+    environ = os.environ if environ is None else environ
+    endpoint = environ.get(ENDPOINT_VARIABLE)
+    if not endpoint:
+        return None
+    options = {}
+    if environ.get(TOKEN_VARIABLE):
+        options["headers"] = {"Authorization": f"Bearer {environ[TOKEN_VARIABLE]}"}
+    if environ.get(INTERVAL_VARIABLE):
+        options["poll_interval"] = float(environ[INTERVAL_VARIABLE])
+    return AttendanceOutbox(db_manager, endpoint, **options)
@@ -0,0 +1,226 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from logic.circuit_breaker import device_breaker
+from logic.connection_pool import connection_pool
+from logic.reachability import DEFAULT_TIMEOUT, check_reachable
+from logic.sync_progress import device_progress
+
+
+class DeviceSyncEngine:
+    """Pulls users and attendance from many devices concurrently."""
+
+    def __init__(
+        self,
+        db_manager,
+        max_workers=8,
+        device_timeout=60,
+        pool=None,
+        reach_timeout=DEFAULT_TIMEOUT,
+    ):
+        """Initialize the sync engine.
+
+        Args:
+            db_manager (DatabaseManager): Database manager shared by all workers.
+            max_workers (int): Maximum number of devices synced at once (default: 8).
+            device_timeout (float): Seconds a single device may take, counted from
+                the moment its worker starts, before it is reported as timed out
+                (default: 60).
+            pool (DeviceConnectionPool, optional): Pool device sessions are leased
+                from (default: the process-wide `connection_pool`).
+            reach_timeout (float): Seconds the devices get to accept the TCP
+                connection of the reachability check run before the workers
+                start. Raise it for devices behind a WAN or VPN link
+                (default: 0.3).
+        """
+        self.db_manager = db_manager
+        self.pool = pool or connection_pool
+        self.max_workers = max(1, int(max_workers))
+        self.device_timeout = device_timeout
+        self.reach_timeout = reach_timeout
+
+    def _new_report(self, device):
+        return {
+            "device_id": device["id"],
+            "name": device["name"],
+            "ip": device["ip"],
+            "port": device["port"],
+            "success": False,
+            "message": "",
+            "users": None,
+            "attendance": None,
+            "duration": 0.0,
+        }
+
+    def sync_device(
+        self, device, started_at=None, reachable=None, progress=None, admitted=False
+    ):
+        """Connect to one device and pull its users and attendance into the database.
+
+        Args:
+            device (dict): Device row as returned by `DatabaseManager.get_devices`.
+            started_at (dict, optional): Shared map the start time is recorded in,
+                keyed by device id, so the caller can enforce the deadline.
+            reachable (bool, optional): Known reachability of the device, passed
+                on to the connect path.
+            progress (callable, optional): Function built by `device_progress`
+                for this device; receives every event of the sync, ending with
+                device_finished.
+            admitted (bool): The caller already claimed this attempt with
+                `device_breaker.allow` (default: False).
+
+        Returns:
+            dict: Per-device report with keys device_id, name, ip, port, success,
+            message, users, attendance and duration (seconds). `users` and
+            `attendance` hold the (success, message) tuples of the pulls.
+        """
+        start = time.monotonic()
+        if started_at is not None:
+            started_at[device["id"]] = start
+        report = self._new_report(device)
+        progress = progress or device_progress(device, None)
+        progress("device_started")
+        try:
+            # Pulls only read, so punching at the terminal stays possible
+            with (
+                self.db_manager.connection(),
+                self.pool.lease(
+                    device["ip"],
+                    device["port"],
+                    db_manager=self.db_manager,
+                    # Don't queue past the deadline behind an abandoned worker
+                    timeout=max(0, self.device_timeout - (time.monotonic() - start)),
+                    read_only=True,
+                    reachable=reachable,
+                    admitted=admitted,
+                ) as (success, fdm),
+            ):
+                if not success:
+                    report["message"] = fdm
+                    return report
+
+                report["success"] = True
+                report["message"] = "Connected successfully."
+                report["users"] = fdm.pull_users_to_db(progress=progress)
+                report["attendance"] = fdm.pull_attendance_to_db(progress=progress)
+                return report
+        except Exception as e:
+            report["message"] = f"Sync failed: {str(e)}"
+            return report
+        finally:
+            report["duration"] = round(time.monotonic() - start, 3)
+            self._finished(progress, report)
+
+    @staticmethod
+    def _finished(progress, report):
+        progress(
+            "device_finished",
+            success=report["success"],
+            message=report["message"],
+            duration=report["duration"],
+        )
+
+    def run(self, devices, progress_callback=None):
+        """Sync all devices concurrently.
+
+        Args:
+            devices (list): Device rows as returned by `DatabaseManager.get_devices`.
+            progress_callback (callable, optional): Receives progress event
+                dicts (see `SyncProgress`) from the worker threads as devices
+                are synced. Every device gets a device_finished event, skipped
+                and timed out ones included.
+
+        Returns:
+            list: One report per device (see `sync_device`), in the order given.
+            Devices whose circuit is open (see `DeviceCircuitBreaker`) or that
+            do not accept a TCP connection within `reach_timeout` are reported
+            at once without a worker. Devices that exceed `device_timeout` are reported
+            with success=False; their worker is abandoned, not interrupted.
+        """
+        if not devices:
+            return []
+
+        progress = {
+            device["id"]: device_progress(device, progress_callback)
+            for device in devices
+        }
+        reports = {}
+        candidates = []
+        for device in devices:
+            # Every attempt is claimed, so a recovering device gets one trial
+            allowed, retry_in = device_breaker.allow(device["ip"], device["port"])
+            if allowed:
+                candidates.append(device)
+                continue
+            report = self._new_report(device)
+            if retry_in:
+                report["message"] = (
+                    f"Skipped: device keeps failing, next attempt in {retry_in:.0f}s."
+                )
+            else:
+                report["message"] = "Skipped: device is being retried elsewhere."
+            reports[device["id"]] = report
+            self._finished(progress[device["id"]], report)
+
+        reachability = check_reachable(
+            ((d["ip"], d["port"]) for d in candidates), self.reach_timeout
+        )
+        reachable = []
+        for device in candidates:
+            if reachability[(device["ip"], device["port"])]:
+                reachable.append(device)
+                continue
+            device_breaker.record_failure(device["ip"], device["port"])
+            report = self._new_report(device)
+            report["message"] = (
+                f"Failed to connect: can't reach device ({device['ip']})"
+            )
+            reports[device["id"]] = report
+            self._finished(progress[device["id"]], report)
+        if not reachable:
+            return [reports[device["id"]] for device in devices]
+
+        started_at = {}
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(reachable)),
+            thread_name_prefix="device-sync",
+        )
+        try:
+            pending = {
+                executor.submit(
+                    self.sync_device,
+                    device,
+                    started_at,
+                    reachable=True,
+                    progress=progress[device["id"]],
+                    admitted=True,
+                ): device
+                for device in reachable
+            }
+            while pending:
+                done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in done:
+                    device = pending.pop(future)
+                    reports[device["id"]] = future.result()
+
+                now = time.monotonic()
+                for future, device in list(pending.items()):
+                    start = started_at.get(device["id"])
+                    if start is None or now - start < self.device_timeout:
+                        continue
+                    future.cancel()
+                    pending.pop(future)
+                    # A hung device must trip the breaker like a refused one
+                    device_breaker.record_failure(device["ip"], device["port"])
+                    report = self._new_report(device)
+                    report["message"] = (
+                        f"Timed out after {self.device_timeout} seconds."
+                    )
+                    report["duration"] = round(now - start, 3)
+                    reports[device["id"]] = report
+                    # Later events from the abandoned worker are dropped
+                    self._finished(progress[device["id"]], report)
+        finally:
+            executor.shutdown(wait=False)
+
+        return [reports[device["id"]] for device in devices]
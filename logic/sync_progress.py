@@ -0,0 +1,131 @@
+import threading
+import time
+
+# Events emitted during a sync, in the order a device goes through them
+SYNC_EVENTS = (
+    "device_started",
+    "users_pulled",
+    "attendance_decoded",
+    "attendance_inserted",
+    "device_finished",
+)
+
+
+class SyncProgress:
+    """Collects sync progress events into a per-device summary.
+
+    Pass an instance as the `progress_callback` of `DashboardLogic.sync_data`
+    (or `DeviceSyncEngine.run`). Events arrive from the sync worker threads;
+    `snapshot` can be read from any thread while the sync runs, e.g. by a UI
+    poll or a throughput monitor.
+
+    Every event is a dict with keys event (one of `SYNC_EVENTS`), device_id,
+    name, ip, port and time (`time.monotonic()`), plus:
+
+        device_started: nothing more.
+        users_pulled: success, message and users (users read, or None).
+        attendance_decoded: rows, the records decoded so far.
+        attendance_inserted: rows, the new records committed so far.
+        device_finished: success, message and duration (seconds).
+    """
+
+    def __init__(self, devices=()):
+        """Initialize the summary.
+
+        Args:
+            devices (iterable): Device rows to list as 'waiting' until their
+                first event arrives (default: none).
+        """
+        self._devices = {}  # device_id -> summary dict
+        self._lock = threading.Lock()
+        for device in devices:
+            self._summary(device["id"], device["name"], device["ip"])
+
+    def _summary(self, device_id, name, ip):
+        return self._devices.setdefault(
+            device_id,
+            {
+                "device_id": device_id,
+                "name": name,
+                "ip": ip,
+                "status": "waiting",
+                "message": "",
+                "users": None,
+                "decoded": 0,
+                "inserted": 0,
+                "started": None,
+                "duration": None,
+                "rows_per_second": 0.0,
+            },
+        )
+
+    def __call__(self, event):
+        with self._lock:
+            summary = self._summary(event["device_id"], event["name"], event["ip"])
+            kind = event["event"]
+            if kind == "device_started":
+                summary["status"] = "syncing"
+                summary["started"] = event["time"]
+            elif kind == "users_pulled":
+                summary["users"] = event["users"]
+            elif kind == "attendance_decoded":
+                summary["decoded"] = event["rows"]
+            elif kind == "attendance_inserted":
+                summary["inserted"] = event["rows"]
+            elif kind == "device_finished":
+                summary["status"] = "done" if event["success"] else "failed"
+                summary["message"] = event["message"]
+                summary["duration"] = event["duration"]
+
+            if summary["started"] is not None:
+                elapsed = summary["duration"] or event["time"] - summary["started"]
+                if elapsed > 0:
+                    summary["rows_per_second"] = round(summary["decoded"] / elapsed, 1)
+
+    def snapshot(self):
+        """Return a copy of the per-device summaries, in the order first seen.
+
+        Returns:
+            list: Dicts with keys device_id, name, ip, status ('waiting',
+            'syncing', 'done' or 'failed'), message, users, decoded, inserted,
+            started, duration and rows_per_second (records decoded per second).
+        """
+        with self._lock:
+            return [dict(summary) for summary in self._devices.values()]
+
+
+def device_progress(device, progress_callback):
+    """Return a `progress(event, **data)` function that tags events with a device.
+
+    Events after `device_finished` are dropped, so a worker abandoned on
+    timeout can't overwrite the device's final state.
+
+    Args:
+        device (dict): Device row the events are about.
+        progress_callback (callable, optional): Receives each event dict. With
+            None the returned function does nothing.
+    """
+    finished = False
+    lock = threading.Lock()
+
+    def progress(event, **data):
+        nonlocal finished
+        if progress_callback is None:
+            return
+        with lock:
+            if finished:
+                return
+            finished = event == "device_finished"
+        progress_callback(
+            {
+                "event": event,
+                "device_id": device["id"],
+                "name": device["name"],
+                "ip": device["ip"],
+                "port": device["port"],
+                "time": time.monotonic(),
+                **data,
+            }
+        )
+
+    return progress
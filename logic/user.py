@@ -61,5 +61,55 @@ class UserManagementLogic:
             )
         return users
 
+    def get_user(self, id_user):
+        """Return one user with its device name, or None if it doesn't exist."""
+        user = self.db_manager.get_user(id_user)
+        if user:
+            device = user["device_id"] and self.db_manager.get_device(user["device_id"])
+            user["device_name"] = device["name"] if device else ""
+        return user
+
+    def get_users_page(self, after_id=None, limit=100):
+        """Return one page of users with their device names.
+
+        See `DatabaseManager.get_users_page`.
+        """
+        users, next_cursor = self.db_manager.get_users_page(after_id, limit)
+        return self._with_device_names(users), next_cursor
+
+    def search_users(
+        self, text="", group_id=None, device_id=None, after=None, limit=100
+    ):
+        """Return one page of users matching a search box and filters.
+
+        Digits in `text` are looked up as a user_id, anything else as a name
+        prefix. See `DatabaseManager.search_users`.
+
+        Returns:
+            tuple: (users: list, next_cursor: tuple or None)
+        """
+        text = text.strip()
+        try:
+            group_id = int(group_id) if group_id not in (None, "") else None
+        except ValueError:
+            return [], None
+        users, next_cursor = self.db_manager.search_users(
+            name=None if text.isdigit() else text or None,
+            user_id=int(text) if text.isdigit() else None,
+            group_id=group_id,
+            device_id=device_id,
+            after=after,
+            limit=limit,
+        )
+        return self._with_device_names(users), next_cursor
+
+    def _with_device_names(self, users):
+        devices = {d["id"]: d["name"] for d in self.db_manager.get_devices()}
+        for user in users:
+            user["device_name"] = (
+                devices.get(user["device_id"], "") if user["device_id"] else ""
+            )
+        return users
+
     def get_devices(self):
         return self.db_manager.get_devices()
@@ -0,0 +1,190 @@
+import struct
+from collections import namedtuple
+from datetime import datetime
+
+# Same field names as pyzk's Attendance, so rows map the same way
+AttendanceRecord = namedtuple(
+    "AttendanceRecord", ["user_id", "timestamp", "status", "punch", "uid"]
+)
+
+# Attendance record layouts by size in bytes, as sent by different firmwares
+ATTENDANCE_FORMATS = {
+    8: struct.Struct("<HBIB"),  # uid, status, time, punch
+    16: struct.Struct("<IIBB2sI"),  # user_id, time, status, punch, -, workcode
+    40: struct.Struct("<H24sBIB8s"),  # uid, user_id, status, time, punch, -
+}
+# User record layouts by size in bytes
+USER_FORMATS = {
+    # uid, privilege, password, name, card, group_id, timezone, user_id
+    28: struct.Struct("<HB5s8sIxBhI"),
+    # uid, privilege, password, name, card, group_id, user_id
+    72: struct.Struct("<HB8s24sIx7sx24s"),
+}
+USER_COLUMNS = ("uid", "privilege", "password", "name", "card", "group_id", "user_id")
+SIZE = struct.Struct("<I")
+
+# Records decoded per chunk by the columnar decoders
+CHUNK_RECORDS = 5000
+
+
+def decode_time(value):
+    """Decode a device timestamp (packed seconds since 2000, 31-day months)."""
+    second = value % 60
+    value //= 60
+    minute = value % 60
+    value //= 60
+    hour = value % 24
+    value //= 24
+    day = value % 31 + 1
+    value //= 31
+    month = value % 12 + 1
+    year = value // 12 + 2000
+    return datetime(year, month, day, hour, minute, second)
+
+
+def _strings(values, encoding="UTF-8"):
+    """Decode a column of NUL-padded byte strings."""
+    return [
+        value.split(b"\x00", 1)[0].decode(encoding, errors="ignore") for value in values
+    ]
+
+
+def _record_size(buffer, count):
+    if not count or len(buffer) < 4:
+        return 0
+    return SIZE.unpack_from(buffer)[0] // count
+
+
+def attendance_record_size(buffer, record_count):
+    """Return the size of one record in a raw attendance buffer.
+
+    Args:
+        buffer (bytes): Data returned by `read_with_buffer(CMD_ATTLOG_RRQ)`,
+            starting with its 4-byte total size.
+        record_count (int): Number of records, as reported by `read_sizes`.
+
+    Returns:
+        int: 8, 16 or 40, or 0 if the buffer holds no records.
+    """
+    return _record_size(buffer, record_count)
+
+
+def _iter_chunks(buffer, record, chunk_records):
+    """Yield `struct.iter_unpack` results transposed into column tuples."""
+    data = memoryview(buffer)[4:]
+    usable = len(data) - len(data) % record.size
+    step = record.size * chunk_records
+    for start in range(0, usable, step):
+        chunk = data[start : min(start + step, usable)]
+        yield tuple(zip(*record.iter_unpack(chunk)))
+
+
+def iter_attendance_columns(
+    buffer, record_count, uid_map=None, chunk_records=CHUNK_RECORDS
+):
+    """Decode a raw attendance buffer into columns, a chunk at a time.
+
+    Each chunk is unpacked in one `struct.iter_unpack` pass and returned as
+    parallel lists, ready to be zipped into insert rows, so per-record work
+    is limited to the string and time conversions.
+
+    Args:
+        buffer (bytes): Data returned by `read_with_buffer(CMD_ATTLOG_RRQ)`.
+        record_count (int): Number of records, as reported by `read_sizes`.
+        uid_map (dict, optional): Device uid -> user_id. The 8 and 16-byte
+            formats only carry one of the two ids and need it to resolve the
+            other; the 40-byte format carries both.
+        chunk_records (int): Records per chunk (default: 5000).
+
+    Yields:
+        dict: Columns user_id (str), timestamp, status, punch and uid, as lists.
+    """
+    size = _record_size(buffer, record_count)
+    if not size:
+        return
+    record = ATTENDANCE_FORMATS.get(size, ATTENDANCE_FORMATS[40])
+    uid_map = uid_map or {}
+    uid_by_user_id = {user_id: uid for uid, user_id in uid_map.items()}
+
+    for columns in _iter_chunks(buffer, record, chunk_records):
+        if size == 8:
+            uids, statuses, times, punches = columns
+            user_ids = [uid_map.get(uid, str(uid)) for uid in uids]
+        elif size == 16:
+            raw_ids, times, statuses, punches, _, _ = columns
+            user_ids, uids = [], []
+            for raw_id in raw_ids:
+                # The field is the user_id; a number missing from the roster
+                # is still a user_id, never a uid to be mapped to another one
+                user_id = str(raw_id)
+                user_ids.append(user_id)
+                uids.append(uid_by_user_id.get(user_id, raw_id))
+        else:
+            uids, raw_ids, statuses, times, punches, _ = columns
+            user_ids = _strings(raw_ids)
+        yield {
+            "user_id": user_ids,
+            "timestamp": list(map(decode_time, times)),
+            "status": list(statuses),
+            "punch": list(punches),
+            "uid": list(uids),
+        }
+
+
+def iter_attendance(buffer, record_count, uid_map=None):
+    """Decode a raw attendance buffer record by record.
+
+    Args:
+        buffer (bytes): Data returned by `read_with_buffer(CMD_ATTLOG_RRQ)`.
+        record_count (int): Number of records, as reported by `read_sizes`.
+        uid_map (dict, optional): Device uid -> user_id, see
+            `iter_attendance_columns`.
+
+    Yields:
+        AttendanceRecord: user_id (str), timestamp, status, punch, uid.
+    """
+    for columns in iter_attendance_columns(buffer, record_count, uid_map):
+        yield from map(AttendanceRecord._make, zip(*columns.values()))
+
+
+def decode_user_columns(buffer, user_count, encoding="UTF-8"):
+    """Decode a raw user buffer into columns in one pass.
+
+    Args:
+        buffer (bytes): Data returned by
+            `read_with_buffer(CMD_USERTEMP_RRQ, FCT_USER)`.
+        user_count (int): Number of users, as reported by `read_sizes`.
+        encoding (str): Encoding of the name and password fields
+            (default: 'UTF-8').
+
+    Returns:
+        dict: Columns uid, privilege, password, name, card, group_id and
+        user_id as lists; empty lists if the buffer holds no users.
+    """
+    columns = {name: [] for name in USER_COLUMNS}
+    size = _record_size(buffer, user_count)
+    if not size:
+        return columns
+    record = USER_FORMATS[28] if size == 28 else USER_FORMATS[72]
+
+    for chunk in _iter_chunks(buffer, record, CHUNK_RECORDS):
+        if size == 28:
+            uids, privileges, passwords, names, cards, group_ids, _, user_ids = chunk
+            group_ids = list(map(str, group_ids))
+            user_ids = list(map(str, user_ids))
+        else:
+            uids, privileges, passwords, names, cards, group_ids, user_ids = chunk
+            group_ids = [group_id.strip() for group_id in _strings(group_ids, encoding)]
+            user_ids = _strings(user_ids, encoding)
+        names = [
+            name.strip() or f"NN-{user_id}"
+            for name, user_id in zip(_strings(names, encoding), user_ids)
+        ]
+        columns["uid"].extend(uids)
+        columns["privilege"].extend(privileges)
+        columns["password"].extend(_strings(passwords, encoding))
+        columns["name"].extend(names)
+        columns["card"].extend(cards)
+        columns["group_id"].extend(group_ids)
+        columns["user_id"].extend(user_ids)
+    return columns
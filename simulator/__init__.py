@@ -0,0 +1,8 @@
+from simulator.outbox_server import FakeOutboxServer
+from simulator.zk_device import FakeZKDevice, FakeZKFleet
+
+__all__ = [
+    "FakeOutboxServer",
+    "FakeZKDevice",
+    "FakeZKFleet",
+]
@@ -0,0 +1,61 @@
+import argparse
+import time
+
+from simulator.zk_device import FakeZKFleet
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run fake ZKTeco terminals on localhost for load testing."
+    )
+    parser.add_argument("--devices", type=int, default=1, help="number of devices")
+    parser.add_argument("--base-port", type=int, default=14370, help="first port")
+    parser.add_argument("--users", type=int, default=100, help="users per device")
+    parser.add_argument(
+        "--attendance", type=int, default=1000, help="punches per device log"
+    )
+    parser.add_argument(
+        "--distinct-users",
+        action="store_true",
+        help="give each device its own range of user ids",
+    )
+    parser.add_argument("--password", type=int, default=0, help="device comm key")
+    parser.add_argument("--latency", type=float, default=0.0, help="reply delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay")
+    parser.add_argument(
+        "--loss", type=float, default=0.0, help="probability a reply is dropped"
+    )
+    parser.add_argument("--dead", type=int, default=0, help="number of dead devices")
+    parser.add_argument("--dead-mode", choices=["refuse", "silent"], default="refuse")
+    parser.add_argument(
+        "--punch-interval", type=float, default=None, help="seconds between punches"
+    )
+    args = parser.parse_args()
+
+    fleet = FakeZKFleet(
+        args.devices,
+        dead_count=args.dead,
+        dead=args.dead_mode,
+        base_port=args.base_port,
+        distinct_users=args.distinct_users,
+        users=args.users,
+        attendance=args.attendance,
+        password=args.password,
+        latency=args.latency,
+        jitter=args.jitter,
+        packet_loss=args.loss,
+        punch_interval=args.punch_interval,
+    )
+    with fleet:
+        for device in fleet.devices:
+            state = device.dead or "online"
+            print(f"{device.serial_number} {device.host}:{device.port} {state}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOutboxServer:
+    """Local HTTP receiver for `AttendanceOutbox`, recording what it is sent.
+
+    Batches are deduplicated by Idempotency-Key the way a real receiver
+    should; `fail_next` makes the next requests fail to exercise retries.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, fail_status=503):
+        """Initialize the server; call `start` to begin serving.
+
+        Args:
+            host (str): Interface to listen on (default: '127.0.0.1').
+            port (int): Port, 0 picks a free one (default: 0).
+            fail_status (int): Status returned by injected failures (default: 503).
+        """
+        self.host = host
+        self.port = port
+        self.fail_status = fail_status
+        self.fail_next = 0
+        self.requests = 0
+        self.batches = {}  # Idempotency-Key -> list of records
+        self._lock = threading.Lock()
+        self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/attendance"
+
+    @property
+    def records(self):
+        """All distinct records received, in arrival order."""
+        with self._lock:
+            return [record for batch in self.batches.values() for record in batch]
+
+    def start(self):
+        outbox = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                with outbox._lock:
+                    outbox.requests += 1
+                    if outbox.fail_next:
+                        outbox.fail_next -= 1
+                        self.send_response(outbox.fail_status)
+                        self.end_headers()
+                        return
+                    if self.headers.get("Content-Encoding") == "gzip":
+                        body = gzip.decompress(body)
+                    key = self.headers.get("Idempotency-Key")
+                    duplicate = key in outbox.batches
+                    if not duplicate:
+                        outbox.batches[key] = json.loads(body)["records"]
+                self.send_response(200 if duplicate else 201)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
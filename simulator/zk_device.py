@@ -0,0 +1,621 @@
+import random
+import select
+import socket
+import struct
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+
+from zk import const
+from zk.base import make_commkey
+
+TCP_TOP = struct.Struct("<HHI")
+HEADER = struct.Struct("<4H")
+USER_RECORD = struct.Struct("<HB8s24sIx7sx24s")  # 72-byte (ZK8) user record
+ATTENDANCE_RECORD = struct.Struct("<H24sB4sB8s")  # 40-byte attendance record
+LIVE_EVENT = struct.Struct("<24sBB6s")  # 32-byte real-time punch event
+OLD_USER_RECORD = struct.Struct("<HB5s8sIxBHI")  # 28-byte (ZK6) user record
+
+# pyzk command ids for buffered reads (not named in zk.const)
+CMD_PREPARE_BUFFER = 1503
+CMD_READ_BUFFER = 1504
+UDP_DATA_SIZE = 1024
+
+OPTIONS = {
+    b"~Platform": b"ZMM220_TFT",
+    b"~ZKFPVersion": b"10",
+    b"~DeviceName": b"Simulated ZK",
+    b"~PIN2Width": b"9",
+    b"FaceFunOn": b"0",
+}
+
+
+def encode_time(t):
+    """Encode a datetime the way the terminal stores it (zkemsdk.c EncodeTime)."""
+    return (
+        ((t.year % 100) * 12 * 31 + ((t.month - 1) * 31) + t.day - 1) * (24 * 60 * 60)
+        + (t.hour * 60 + t.minute) * 60
+        + t.second
+    )
+
+
+def checksum(packet):
+    """Packet checksum, as computed by the terminal firmware (zkemsdk.c)."""
+    if len(packet) % 2:
+        packet += b"\x00"
+    total = sum(struct.unpack(f"<{len(packet) // 2}H", packet))
+    while total > const.USHRT_MAX:
+        total -= const.USHRT_MAX
+    total = ~total
+    while total < 0:
+        total += const.USHRT_MAX
+    return total
+
+
+class _Session:
+    def __init__(self, session_id, authenticated):
+        self.session_id = session_id
+        self.authenticated = authenticated
+        self.events = 0
+        self.pending_events = deque()
+        self.awaiting_ack = False
+        self.buffer = b""
+
+
+class FakeZKDevice:
+    """Fake ZKTeco terminal speaking the subset of the TCP/UDP protocol pyzk uses.
+
+    Supports connect/auth, enable/disable, get_time, read_sizes, get_users,
+    get_attendance (buffered reads), set_user, delete_user, clear_attendance
+    and live capture. TCP and UDP are served on the same port.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        users=100,
+        attendance=1000,
+        first_user_id=1001,
+        password=0,
+        latency=0.0,
+        jitter=0.0,
+        packet_loss=0.0,
+        dead=None,
+        punch_interval=None,
+        serial_number=None,
+        start_time=datetime(2024, 1, 1, 8, 0),
+        seed=0,
+    ):
+        """Initialize the device; call `start` to begin serving.
+
+        Args:
+            host (str): Interface to listen on (default: '127.0.0.1').
+            port (int): Port for both TCP and UDP, 0 picks a free one (default: 0).
+            users (int): Users enrolled on the device (default: 100).
+            attendance (int): Punches in the device log (default: 1000).
+            first_user_id (int): user_id of the first enrolled user; the rest
+                follow consecutively (default: 1001).
+            password (int): Comm key required at connect, 0 for none (default: 0).
+            latency (float): Seconds added before every reply (default: 0).
+            jitter (float): Random extra seconds, up to this much, per reply
+                (default: 0).
+            packet_loss (float): Probability that a reply is dropped (default: 0).
+            dead (str, optional): 'refuse' to keep the port closed, 'silent' to
+                accept connections but never answer (default: None, healthy).
+            punch_interval (float, optional): Seconds between generated live
+                punches (default: None, no generated punches).
+            serial_number (str, optional): Reported serial number.
+            start_time (datetime): Timestamp of the first generated punch.
+            seed (int): Seed for the generated data and fault injection.
+        """
+        self.host = host
+        self.port = port
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.packet_loss = packet_loss
+        self.dead = dead
+        self.punch_interval = punch_interval
+        self.serial_number = serial_number
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._running = threading.Event()
+        self._sessions = {}  # session key -> _Session
+        self._sockets = []
+        self._threads = []
+
+        self._users = {}  # uid -> (privilege, password, name, card, group_id, user_id)
+        for uid in range(1, users + 1):
+            user_id = str(first_user_id + uid - 1)
+            self._users[uid] = (0, "", f"User {user_id}", 0, "1", user_id)
+        self._users_buffer = None
+
+        self._attendance = bytearray(ATTENDANCE_RECORD.size * attendance)
+        self._last_punch = start_time
+        user_ids = list(self._users.items())
+        for index in range(attendance):
+            uid, user = user_ids[index % len(user_ids)] if user_ids else (1, None)
+            user_id = user[5] if user else "1"
+            self._last_punch = start_time + timedelta(seconds=37 * index)
+            ATTENDANCE_RECORD.pack_into(
+                self._attendance,
+                index * ATTENDANCE_RECORD.size,
+                uid,
+                user_id.encode(),
+                index % 2,
+                struct.pack("<I", encode_time(self._last_punch)),
+                0,
+                b"",
+            )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def address(self):
+        return self.host, self.port
+
+    @property
+    def user_count(self):
+        with self._lock:
+            return len(self._users)
+
+    @property
+    def record_count(self):
+        with self._lock:
+            return len(self._attendance) // ATTENDANCE_RECORD.size
+
+    def start(self):
+        """Bind the TCP and UDP sockets and start serving in daemon threads."""
+        tcp, udp = self._bind()
+        self._running.set()
+        if self.dead == "refuse":
+            tcp.close()
+            udp.close()
+            return self
+        self._sockets = [tcp, udp]
+        self._spawn(self._serve_tcp, tcp)
+        self._spawn(self._serve_udp, udp)
+        if self.punch_interval:
+            self._spawn(self._generate_punches)
+        return self
+
+    def stop(self):
+        """Stop serving and close every socket."""
+        self._running.clear()
+        for sock in self._sockets:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._sockets = []
+        self._threads = []
+
+    def punch(self, user_id=None, status=0, timestamp=None):
+        """Record a punch in the log and push it to live-capture sessions.
+
+        Args:
+            user_id (str, optional): Enrolled user id; a random user by default.
+            status (int): Punch status, 0 check-in and 1 check-out (default: 0).
+            timestamp (datetime, optional): Punch time (default: now).
+        """
+        with self._lock:
+            if user_id is None:
+                user_id = self._random.choice(list(self._users.values()))[5]
+            uid = next(
+                (uid for uid, user in self._users.items() if user[5] == user_id), 0
+            )
+            timestamp = (timestamp or datetime.now()).replace(microsecond=0)
+            self._attendance += ATTENDANCE_RECORD.pack(
+                uid,
+                user_id.encode(),
+                status,
+                struct.pack("<I", encode_time(timestamp)),
+                0,
+                b"",
+            )
+            self._last_punch = timestamp
+            event = LIVE_EVENT.pack(
+                user_id.encode(),
+                status,
+                0,
+                bytes(
+                    [
+                        timestamp.year - 2000,
+                        timestamp.month,
+                        timestamp.day,
+                        timestamp.hour,
+                        timestamp.minute,
+                        timestamp.second,
+                    ]
+                ),
+            )
+            for session in self._sessions.values():
+                if session.events & const.EF_ATTLOG:
+                    session.pending_events.append(event)
+
+    def _bind(self):
+        for _ in range(20):
+            tcp = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            tcp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            tcp.bind((self.host, self.port))
+            port = tcp.getsockname()[1]
+            udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                udp.bind((self.host, port))
+            except OSError:
+                tcp.close()
+                udp.close()
+                if self.port:
+                    raise
+                continue
+            self.port = port
+            tcp.listen(16)
+            return tcp, udp
+        raise OSError("No free port for both TCP and UDP.")
+
+    def _spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _generate_punches(self):
+        while self._running.is_set():
+            time.sleep(self.punch_interval)
+            if self._users:
+                self.punch(status=self._random.randint(0, 1))
+
+    def _delay_and_drop(self):
+        """Apply injected latency; return True if the reply should be dropped."""
+        delay = self.latency + (self._random.random() * self.jitter)
+        if delay:
+            time.sleep(delay)
+        return self._random.random() < self.packet_loss
+
+    def _users_data(self):
+        if self._users_buffer is None:
+            records = b"".join(
+                USER_RECORD.pack(
+                    uid,
+                    privilege,
+                    password.encode(),
+                    name.encode(),
+                    card,
+                    group_id.encode(),
+                    user_id.encode(),
+                )
+                for uid, (privilege, password, name, card, group_id, user_id) in sorted(
+                    self._users.items()
+                )
+            )
+            self._users_buffer = struct.pack("<I", len(records)) + records
+        return self._users_buffer
+
+    def _buffer_for(self, payload):
+        _, command, fct, _ = struct.unpack("<bhii", payload[:11])
+        with self._lock:
+            if command == const.CMD_USERTEMP_RRQ and fct == const.FCT_USER:
+                return self._users_data()
+            if command == const.CMD_ATTLOG_RRQ:
+                return struct.pack("<I", len(self._attendance)) + bytes(
+                    self._attendance
+                )
+        return struct.pack("<I", 0)
+
+    def _free_sizes(self):
+        with self._lock:
+            users = len(self._users)
+            records = len(self._attendance) // ATTENDANCE_RECORD.size
+        fields = [0] * 20
+        fields[4] = users
+        fields[8] = records
+        fields[14] = 3000  # fingers capacity
+        fields[15] = max(10000, users)
+        fields[16] = max(100000, records)
+        fields[17] = 3000
+        fields[18] = fields[15] - users
+        fields[19] = fields[16] - records
+        return struct.pack("<20i", *fields) + struct.pack("<3i", 0, 0, 0)
+
+    def _set_user(self, payload):
+        if len(payload) >= USER_RECORD.size:
+            uid, privilege, password, name, card, group_id, user_id = struct.unpack(
+                "<HB8s24s4sx7sx24s", payload[: USER_RECORD.size]
+            )
+            card = struct.unpack("<I", card)[0]
+            group_id = group_id.split(b"\x00")[0].decode(errors="ignore")
+            user_id = user_id.split(b"\x00")[0].decode(errors="ignore")
+        else:
+            uid, privilege, password, name, card, group_id, _, user_id = (
+                OLD_USER_RECORD.unpack(payload[: OLD_USER_RECORD.size])
+            )
+            group_id, user_id = str(group_id), str(user_id)
+        with self._lock:
+            self._users[uid] = (
+                privilege,
+                password.split(b"\x00")[0].decode(errors="ignore"),
+                name.split(b"\x00")[0].decode(errors="ignore"),
+                card,
+                group_id,
+                user_id,
+            )
+            self._users_buffer = None
+
+    def _handle(self, session, command, payload, tcp):
+        """Execute one command; return a list of (reply command, data) packets."""
+        self.stats[command] += 1
+        if not session.authenticated:
+            if command == const.CMD_AUTH:
+                if payload[:4] == make_commkey(self.password, session.session_id):
+                    session.authenticated = True
+                    return [(const.CMD_ACK_OK, b"")]
+            return [(const.CMD_ACK_UNAUTH, b"")]
+
+        if command == const.CMD_GET_FREE_SIZES:
+            return [(const.CMD_ACK_OK, self._free_sizes())]
+        if command == const.CMD_GET_TIME:
+            return [(const.CMD_ACK_OK, struct.pack("<I", encode_time(datetime.now())))]
+        if command == const.CMD_GET_VERSION:
+            return [(const.CMD_ACK_OK, b"Ver 6.60 Simulated\x00")]
+        if command == const.CMD_OPTIONS_RRQ:
+            key = payload.split(b"\x00")[0]
+            if key == b"~SerialNumber":
+                value = (self.serial_number or f"SIM{self.port}").encode()
+            else:
+                value = OPTIONS.get(key, b"")
+            return [(const.CMD_ACK_OK, key + b"=" + value + b"\x00")]
+        if command == CMD_PREPARE_BUFFER:
+            buffer = self._buffer_for(payload)
+            if tcp:
+                return [(const.CMD_DATA, buffer)]
+            session.buffer = buffer
+            return [(const.CMD_ACK_OK, b"\x00" + struct.pack("<I", len(buffer)))]
+        if command == CMD_READ_BUFFER:
+            start, size = struct.unpack("<ii", payload[:8])
+            chunk = session.buffer[start : start + size]
+            replies = [(const.CMD_PREPARE_DATA, struct.pack("<I", len(chunk)))]
+            replies += [
+                (const.CMD_DATA, chunk[i : i + UDP_DATA_SIZE])
+                for i in range(0, len(chunk), UDP_DATA_SIZE)
+            ]
+            return replies + [(const.CMD_ACK_OK, b"")]
+        if command == const.CMD_FREE_DATA:
+            session.buffer = b""
+        elif command == const.CMD_USER_WRQ:
+            self._set_user(payload)
+        elif command == const.CMD_DELETE_USER:
+            uid = struct.unpack("<h", payload[:2])[0]
+            with self._lock:
+                if self._users.pop(uid, None) is None:
+                    return [(const.CMD_ACK_ERROR, b"")]
+                self._users_buffer = None
+        elif command == const.CMD_CLEAR_ATTLOG:
+            with self._lock:
+                self._attendance = bytearray()
+        elif command == const.CMD_CLEAR_DATA:
+            with self._lock:
+                self._attendance = bytearray()
+                self._users = {}
+                self._users_buffer = None
+        elif command == const.CMD_REG_EVENT:
+            session.events = struct.unpack("<I", payload[:4])[0]
+            if not session.events:
+                session.pending_events.clear()
+        elif command not in (
+            const.CMD_EXIT,
+            const.CMD_ENABLEDEVICE,
+            const.CMD_DISABLEDEVICE,
+            const.CMD_TESTVOICE,
+            const.CMD_REFRESHDATA,
+            const.CMD_CANCELCAPTURE,
+            const.CMD_STARTVERIFY,
+            const.CMD_SET_TIME,
+            const.CMD_OPTIONS_WRQ,
+        ):
+            return [(const.CMD_ACK_UNKNOWN, b"")]
+        return [(const.CMD_ACK_OK, b"")]
+
+    def _packet(self, command, session_id, reply_id, data):
+        body = HEADER.pack(command, 0, session_id, reply_id) + data
+        return HEADER.pack(command, checksum(body), session_id, reply_id) + data
+
+    def _process(self, key, packet, tcp):
+        """Handle one client packet; return packets to send back and session state."""
+        command, _, session_id, reply_id = HEADER.unpack(packet[:8])
+        payload = packet[8:]
+        with self._lock:
+            session = self._sessions.get(key)
+        if command == const.CMD_CONNECT:
+            session = _Session(
+                self._random.randint(1, const.USHRT_MAX - 1), not self.password
+            )
+            with self._lock:
+                self._sessions[key] = session
+            self.stats[command] += 1
+            reply = const.CMD_ACK_UNAUTH if self.password else const.CMD_ACK_OK
+            replies = [(reply, b"")]
+        elif session is None:
+            # Commands outside a session are refused, as by a real terminal
+            return [self._packet(const.CMD_ACK_UNAUTH, 0, reply_id, b"")], None
+        elif command == const.CMD_ACK_OK:
+            session.awaiting_ack = False  # Live event acknowledged
+            return [], session
+        else:
+            session.awaiting_ack = False
+            replies = self._handle(session, command, payload, tcp)
+
+        if self._delay_and_drop():
+            return [], session
+        packets = [
+            self._packet(reply, session.session_id, reply_id, data)
+            for reply, data in replies
+        ]
+        if command == const.CMD_EXIT:
+            with self._lock:
+                self._sessions.pop(key, None)
+            return packets, None
+        return packets, session
+
+    def _next_event(self, session):
+        if (
+            session is None
+            or session.awaiting_ack
+            or not session.pending_events
+            or not session.events & const.EF_ATTLOG
+        ):
+            return None
+        session.awaiting_ack = True
+        event = session.pending_events.popleft()
+        return self._packet(const.CMD_REG_EVENT, session.session_id, 0, event)
+
+    def _serve_tcp(self, listener):
+        listener.settimeout(0.2)
+        while self._running.is_set():
+            try:
+                client, _ = listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            self.stats["connections"] += 1
+            self._spawn(self._serve_tcp_client, client)
+
+    def _serve_tcp_client(self, client):
+        key = ("tcp", id(client))
+        session = None
+        pending = b""
+        try:
+            while self._running.is_set():
+                event = self._next_event(session)
+                if event:
+                    client.sendall(
+                        TCP_TOP.pack(
+                            const.MACHINE_PREPARE_DATA_1,
+                            const.MACHINE_PREPARE_DATA_2,
+                            len(event),
+                        )
+                        + event
+                    )
+                readable, _, _ = select.select([client], [], [], 0.05)
+                if not readable:
+                    continue
+                data = client.recv(65536)
+                if not data:
+                    return
+                if self.dead == "silent":
+                    continue
+                pending += data
+                while len(pending) >= TCP_TOP.size:
+                    _, _, length = TCP_TOP.unpack(pending[: TCP_TOP.size])
+                    if len(pending) < TCP_TOP.size + length:
+                        break
+                    packet = pending[TCP_TOP.size : TCP_TOP.size + length]
+                    pending = pending[TCP_TOP.size + length :]
+                    replies, session = self._process(key, packet, tcp=True)
+                    for reply in replies:
+                        client.sendall(
+                            TCP_TOP.pack(
+                                const.MACHINE_PREPARE_DATA_1,
+                                const.MACHINE_PREPARE_DATA_2,
+                                len(reply),
+                            )
+                            + reply
+                        )
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._sessions.pop(key, None)
+            client.close()
+
+    def _serve_udp(self, sock):
+        sessions = {}  # client address -> session
+        while self._running.is_set():
+            for address, session in list(sessions.items()):
+                event = self._next_event(session)
+                if event:
+                    sock.sendto(event, address)
+            try:
+                readable, _, _ = select.select([sock], [], [], 0.05)
+                if not readable:
+                    continue
+                packet, address = sock.recvfrom(65536)
+            except OSError:
+                return
+            if self.dead == "silent" or len(packet) < HEADER.size:
+                continue
+            replies, session = self._process(("udp", address), packet, tcp=False)
+            if session is None:
+                sessions.pop(address, None)
+            else:
+                sessions[address] = session
+            for reply in replies:
+                sock.sendto(reply, address)
+
+
+class FakeZKFleet:
+    """Many `FakeZKDevice` instances on localhost ports, started and stopped together."""
+
+    def __init__(
+        self,
+        count,
+        dead_count=0,
+        dead="refuse",
+        base_port=0,
+        distinct_users=False,
+        **options,
+    ):
+        """Initialize the fleet.
+
+        Args:
+            count (int): Number of devices.
+            dead_count (int): How many of them are dead (default: 0).
+            dead (str): Dead-device behaviour, see `FakeZKDevice` (default: 'refuse').
+            base_port (int): First port; consecutive ports are used. 0 picks free
+                ports (default: 0).
+            distinct_users (bool): Give every device its own range of user ids
+                instead of the same roster, so their punches never coincide
+                (default: False).
+            **options: Passed to every `FakeZKDevice`.
+        """
+        users = options.get("users", 100)
+        self.devices = [
+            FakeZKDevice(
+                port=base_port + index if base_port else 0,
+                dead=dead if index >= count - dead_count else None,
+                serial_number=f"SIM{index:05d}",
+                seed=index,
+                first_user_id=1001 + index * users if distinct_users else 1001,
+                **options,
+            )
+            for index in range(count)
+        ]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def addresses(self):
+        return [device.address for device in self.devices]
+
+    def start(self):
+        for device in self.devices:
+            device.start()
+        return self
+
+    def stop(self):
+        for device in self.devices:
+            device.stop()
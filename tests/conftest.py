@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database_manager  # noqa: E402
+from database_manager import DatabaseManager  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A DatabaseManager on a fresh database file."""
+    database_manager.configure_database(str(tmp_path / "app_data.db"))
+    manager = DatabaseManager()
+    manager.initialize_tables()
+    yield manager
+    database_manager.database.close_all()
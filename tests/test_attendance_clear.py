@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from database_manager import AttendanceClear
+from logic.device_control import FingerprintDeviceManager
+from simulator import FakeZKDevice
+
+WHOLE_LOG = (datetime(2000, 1, 1), datetime(2100, 1, 1))
+
+
+@pytest.fixture
+def device(db):
+    """A fake device registered for retention mode, with its users pulled."""
+    with FakeZKDevice(users=5, attendance=40) as fake:
+        db.insert_device(
+            {
+                "name": "Front door",
+                "device_model": "F18",
+                "serial_number": "SIM-1",
+                "ip": "127.0.0.1",
+                "port": fake.port,
+                "clear_after_ingest": True,
+            }
+        )
+        manager = FingerprintDeviceManager("127.0.0.1", fake.port, db_manager=db)
+        assert manager.connect()[0]
+        assert manager.pull_users_to_db()[0]
+        yield fake, manager
+        manager.disconnect()
+
+
+def stored(db):
+    return db.count_device_attendance("127.0.0.1", *WHOLE_LOG)
+
+
+def pending(db, fake):
+    return db.get_pending_attendance_clears("127.0.0.1", fake.port)
+
+
+def crash_on_clear(manager, wipe_first):
+    """Make the clear fail as if the process died around it."""
+    clear = manager.conn.clear_attendance
+
+    def crashing_clear():
+        if wipe_first:
+            clear()
+        raise ConnectionError("connection lost")
+
+    manager.conn.clear_attendance = crashing_clear
+
+
+def test_clears_log_once_every_punch_is_stored(db, device):
+    fake, manager = device
+
+    success, message = manager.pull_attendance_to_db()
+
+    assert success, message
+    assert "Device log cleared" in message
+    assert fake.record_count == 0
+    assert stored(db) > 0
+    assert pending(db, fake) == []
+
+
+def test_crash_between_journal_and_clear_leaves_pending_entry(db, device):
+    fake, manager = device
+    crash_on_clear(manager, wipe_first=False)
+
+    success, _ = manager.pull_attendance_to_db()
+
+    assert not success
+    assert fake.record_count == 40
+    assert len(pending(db, fake)) == 1
+
+
+@pytest.mark.parametrize("wipe_first", [False, True])
+def test_next_pull_recovers_interrupted_clear(db, device, wipe_first):
+    fake, manager = device
+    crash_on_clear(manager, wipe_first)
+    manager.pull_attendance_to_db()
+    before = stored(db)
+
+    # Taken after the interrupted clear; with the log wiped its size alone
+    # can't tell the checkpoint what is new.
+    for second in range(3):
+        fake.punch(timestamp=datetime(2030, 1, 1, 9, 0, second))
+    del manager.conn.clear_attendance
+    success, message = manager.pull_attendance_to_db()
+
+    assert success, message
+    assert stored(db) == before + 3
+    assert fake.record_count == 0
+    assert pending(db, fake) == []
+    journal = AttendanceClear.select().order_by(AttendanceClear.id)
+    assert [entry.status for entry in journal] == ["recovered", "cleared"]
+
+
+def test_punch_between_read_and_clear_keeps_log(db, device):
+    fake, manager = device
+    read_sizes = manager.conn.read_sizes
+    calls = 0
+
+    def read_sizes_with_punch():
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            # Second read is the clear's re-check, after the log was pulled
+            fake.punch()
+        return read_sizes()
+
+    manager.conn.read_sizes = read_sizes_with_punch
+    success, message = manager.pull_attendance_to_db()
+
+    assert success
+    assert "not cleared" in message
+    assert fake.record_count == 41
+    assert pending(db, fake) == []
+
+
+def test_moved_punch_keeps_log(db, device, monkeypatch):
+    fake, manager = device
+    sync = db.sync
+
+    def sync_then_move_a_row():
+        # Same row count for the device and period, but one punch is gone
+        result = sync()
+        row = db.get_attendance()[0]
+        db.update_attendance(
+            row["id"], {"timestamp": row["timestamp"] + timedelta(microseconds=1)}
+        )
+        return result
+
+    monkeypatch.setattr(db, "sync", sync_then_move_a_row)
+    success, message = manager.pull_attendance_to_db()
+
+    assert success
+    assert "1 of" in message and "not found in the database" in message
+    assert fake.record_count == 40
+    assert pending(db, fake) == []
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import pytest
+
+from logic.device_control import FingerprintDeviceManager
+from simulator import FakeZKDevice
+
+WHOLE_LOG = (datetime(2000, 1, 1), datetime(2100, 1, 1))
+
+
+@pytest.fixture
+def device(db):
+    """A registered fake device with its users pulled."""
+    with FakeZKDevice(users=5, attendance=20) as fake:
+        db.insert_device(
+            {
+                "name": "Front door",
+                "device_model": "F18",
+                "serial_number": "SIM-1",
+                "ip": "127.0.0.1",
+                "port": fake.port,
+            }
+        )
+        manager = FingerprintDeviceManager("127.0.0.1", fake.port, db_manager=db)
+        assert manager.connect()[0]
+        assert manager.pull_users_to_db()[0]
+        yield fake, manager
+        manager.disconnect()
+
+
+def stored(db):
+    return db.count_device_attendance("127.0.0.1", *WHOLE_LOG)
+
+
+def test_unchanged_log_is_not_read_again(db, device):
+    fake, manager = device
+    manager.pull_attendance_to_db()
+    before = stored(db)
+
+    success, message = manager.pull_attendance_to_db()
+
+    assert success
+    assert message == "No new attendance records found."
+    assert stored(db) == before
+
+
+def test_punch_older_than_newest_stored_is_pulled(db, device):
+    fake, manager = device
+    manager.pull_attendance_to_db()
+    before = stored(db)
+
+    # As after the device clock was set back
+    fake.punch(timestamp=datetime(2023, 6, 1, 8, 0))
+    success, message = manager.pull_attendance_to_db()
+
+    assert success, message
+    assert stored(db) == before + 1
+
+
+def test_log_cleared_elsewhere_and_refilled_is_pulled(db, device):
+    fake, manager = device
+    manager.pull_attendance_to_db()
+    before = stored(db)
+
+    # Refilled past its old size, so the log looks as if it only grew
+    manager.conn.clear_attendance()
+    for second in range(25):
+        fake.punch(timestamp=datetime(2023, 6, 1, 8, 0, second))
+    success, message = manager.pull_attendance_to_db()
+
+    assert success, message
+    assert message == "25 new attendance records inserted."
+    assert stored(db) == before + 25
@@ -0,0 +1,74 @@
+import pytest
+
+from logic import circuit_breaker
+from logic.circuit_breaker import DeviceCircuitBreaker
+
+DEVICE = ("10.0.0.1", 4370)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable `time.monotonic` for the breaker."""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def breaker(clock):
+    return DeviceCircuitBreaker(failure_threshold=2, base_delay=10, max_delay=35)
+
+
+def fail(breaker, times=1):
+    for _ in range(times):
+        breaker.record_failure(*DEVICE)
+
+
+def test_stays_closed_below_threshold(breaker):
+    fail(breaker)
+
+    assert breaker.allow(*DEVICE) == (True, 0)
+    assert breaker.allow(*DEVICE) == (True, 0)
+    assert not breaker.is_open(*DEVICE)
+
+
+def test_opens_at_threshold_and_backs_off(breaker, clock):
+    fail(breaker, 2)
+    assert breaker.allow(*DEVICE) == (False, 10)
+
+    # Each failed trial doubles the delay, up to max_delay
+    for delay in (20, 35, 35):
+        clock[0] += breaker.retry_in(*DEVICE)
+        assert breaker.allow(*DEVICE) == (True, 0)
+        fail(breaker)
+        assert breaker.retry_in(*DEVICE) == delay
+
+
+def test_half_open_lets_a_single_trial_through(breaker, clock):
+    fail(breaker, 2)
+    clock[0] += 10
+
+    assert breaker.allow(*DEVICE) == (True, 0)
+    # Not open, but the trial is taken until its outcome is recorded
+    assert breaker.allow(*DEVICE) == (False, 0)
+    assert not breaker.is_open(*DEVICE)
+
+
+def test_successful_trial_closes_circuit(breaker, clock):
+    fail(breaker, 2)
+    clock[0] += 10
+    breaker.allow(*DEVICE)
+
+    breaker.record_success(*DEVICE)
+
+    assert breaker.allow(*DEVICE) == (True, 0)
+    assert breaker.allow(*DEVICE) == (True, 0)
+    fail(breaker)
+    assert not breaker.is_open(*DEVICE)
+
+
+def test_devices_are_tracked_apart(breaker):
+    fail(breaker, 2)
+
+    assert breaker.is_open(*DEVICE)
+    assert breaker.allow("10.0.0.1", 4371) == (True, 0)
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from logic.circuit_breaker import device_breaker
+from logic.connection_pool import DeviceConnectionPool
+from simulator import FakeZKDevice
+
+
+@pytest.fixture
+def fake():
+    device_breaker._states.clear()
+    with FakeZKDevice(users=3, attendance=5) as device:
+        yield device
+
+
+@pytest.fixture
+def pool():
+    pool = DeviceConnectionPool(idle_timeout=0.3)
+    yield pool
+    pool.close_all()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_released_session_is_reused(db, fake, pool):
+    with pool.lease("127.0.0.1", fake.port, db_manager=db) as (success, first):
+        assert success, first
+    with pool.lease("127.0.0.1", fake.port, db_manager=db) as (success, second):
+        assert success, second
+
+    assert second is first
+    assert len(fake._sessions) == 1
+
+
+def test_lease_waits_for_a_free_slot(db, fake, pool):
+    success, fdm = pool.acquire("127.0.0.1", fake.port, db_manager=db)
+    assert success, fdm
+
+    assert pool.acquire("127.0.0.1", fake.port, db_manager=db, timeout=0.1) == (
+        False,
+        "No free connection to the device.",
+    )
+    pool.release(fdm)
+    success, again = pool.acquire("127.0.0.1", fake.port, db_manager=db, timeout=0.1)
+    assert success
+    pool.release(again)
+
+
+def test_dropped_session_is_replaced(db, fake, pool):
+    with pool.lease("127.0.0.1", fake.port, db_manager=db) as (_, first):
+        pass
+    first.conn.disconnect()
+
+    with pool.lease("127.0.0.1", fake.port, db_manager=db) as (success, second):
+        assert success
+        assert second is not first
+        assert second.is_connected()
+
+
+def test_idle_sessions_are_reaped(db, fake, pool):
+    with pool.lease("127.0.0.1", fake.port, db_manager=db) as (_, fdm):
+        pass
+    assert len(fake._sessions) == 1
+
+    wait_for(lambda: not fake._sessions)
+    assert not fdm.is_connect
+    assert pool._idle == {("127.0.0.1", fake.port, 0): []}
+
+
+def test_close_all_disconnects_idle_sessions(db, fake):
+    pool = DeviceConnectionPool(idle_timeout=60)
+    with pool.lease("127.0.0.1", fake.port, db_manager=db):
+        pass
+
+    pool.close_all()
+
+    wait_for(lambda: not fake._sessions)
+    assert pool._reaper is None
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from database_manager import AttendanceIngestWriter
+
+FIELDS = ("user_id", "timestamp", "device_ip", "synced", "created_at", "updated_at")
+
+
+def punches(user_id, count, device_ip="10.0.0.1"):
+    now = datetime.now()
+    return [
+        (user_id, datetime(2024, 1, 1, 8, minute), device_ip, False, now, now)
+        for minute in range(count)
+    ]
+
+
+def test_bad_batch_does_not_fail_batches_sharing_its_transaction(db):
+    db.insert_user(
+        {"name": "a", "privilege": "User", "password": "", "user_id": 1, "group_id": 0}
+    )
+    # A long flush interval makes all three batches share one transaction
+    writer = AttendanceIngestWriter(db, flush_interval=0.5)
+    _, good = writer.submit(punches(1, 3), FIELDS)
+    _, bad = writer.submit([(1, None, "10.0.0.2", False, None, None)], FIELDS)
+    _, other = writer.submit(punches(1, 2, "10.0.0.3"), FIELDS)
+
+    assert good.result(timeout=5) == 3
+    assert other.result(timeout=5) == 2
+    assert bad.exception(timeout=5) is not None
+    assert (
+        db.count_device_attendance(
+            "10.0.0.1", datetime(2024, 1, 1), datetime(2024, 1, 2)
+        )
+        == 3
+    )
@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from zk import const
+
+from logic.device_control import FingerprintDeviceManager
+from simulator import FakeZKDevice
+
+WHOLE_LOG = (datetime(2000, 1, 1), datetime(2100, 1, 1))
+
+
+@pytest.fixture
+def device(db):
+    """A registered fake device with its users pulled."""
+    with FakeZKDevice(users=5, attendance=20) as fake:
+        db.insert_device(
+            {
+                "name": "Front door",
+                "device_model": "F18",
+                "serial_number": "SIM-1",
+                "ip": "127.0.0.1",
+                "port": fake.port,
+            }
+        )
+        manager = FingerprintDeviceManager("127.0.0.1", fake.port, db_manager=db)
+        assert manager.connect()[0]
+        assert manager.pull_users_to_db()[0]
+        manager.disconnect()
+        yield fake, manager
+
+
+def stored(db):
+    return db.count_device_attendance("127.0.0.1", *WHOLE_LOG)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def capturing(fake):
+    return any(s.events & const.EF_ATTLOG for s in list(fake._sessions.values()))
+
+
+def test_captured_punches_are_stored_and_checkpointed(db, device):
+    fake, manager = device
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.update(
+            capture=manager.live_capture_to_db(flush_interval=0.1)
+        )
+    )
+    thread.start()
+    try:
+        wait_for(lambda: capturing(fake))
+        pulled = stored(db)
+        for user_id in ("1001", "1002", "1003"):
+            fake.punch(user_id)
+        wait_for(lambda: stored(db) == pulled + 3)
+    finally:
+        manager.stop_live_capture()
+        thread.join(5)
+
+    assert not thread.is_alive()
+    assert result["capture"] == (True, "Live capture stopped, 3 records inserted.")
+    device_row = db.get_device_by_address("127.0.0.1", fake.port)
+    assert device_row["last_record_count"] == fake.record_count == 23
+    # The captured punches are not read again
+    assert manager.connect()[0]
+    assert manager.pull_attendance_to_db() == (
+        True,
+        "No new attendance records found.",
+    )
+    manager.disconnect()
+
+
+def test_stop_requested_before_start_is_honoured(db, device):
+    fake, manager = device
+    manager.stop_live_capture()
+
+    success, message = manager.live_capture_to_db()
+
+    assert success
+    assert message == "Live capture stopped, 0 records inserted."
+    assert stored(db) == 0
+
+
+def test_caller_stop_event_is_left_set(db, device):
+    fake, manager = device
+    stop = threading.Event()
+    stop.set()
+
+    assert manager.live_capture_to_db(stop_event=stop)[0]
+    assert stop.is_set()
+    # A later capture doesn't inherit the caller's event
+    assert manager._stop_live is not stop
@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import pytest
+
+from logic.outbox import AttendanceOutbox, outbox_from_environment
+from simulator import FakeOutboxServer
+
+
+@pytest.fixture
+def server():
+    with FakeOutboxServer() as fake:
+        yield fake
+
+
+@pytest.fixture
+def punches(db):
+    """Three unsynced punches."""
+    db.insert_user(
+        {"name": "a", "privilege": "User", "password": "", "user_id": 1, "group_id": 0}
+    )
+    for minute in range(3):
+        db.insert_attendance(
+            {
+                "user_id": 1,
+                "timestamp": datetime(2024, 1, 1, 8, minute),
+                "status": "in",
+                "device_ip": "10.0.0.1",
+            }
+        )
+    return db
+
+
+def outbox(db, server, **options):
+    options.setdefault("backoff", 0.01)
+    return AttendanceOutbox(db, server.url, timeout=2, **options)
+
+
+def test_retries_with_backoff_after_failures(punches, server, monkeypatch):
+    server.fail_next = 3
+    box = outbox(punches, server, backoff=1, max_backoff=3)
+    delays = []
+    monkeypatch.setattr(box._stop, "wait", lambda delay: delays.append(delay))
+
+    success, message = box.push()
+
+    assert success, message
+    assert delays == [1, 2, 3]
+    assert server.requests == 4
+    assert len(server.records) == 3
+    assert punches.get_unsynced_attendance() == []
+
+
+def test_batch_sent_again_carries_same_key(punches, server, monkeypatch):
+    box = outbox(punches, server)
+    mark = punches.mark_attendance_synced
+    # The receiver accepts the batch, but the app dies before flagging it
+    monkeypatch.setattr(
+        punches, "mark_attendance_synced", lambda ids: (False, "crashed")
+    )
+    assert not box.push()[0]
+    monkeypatch.setattr(punches, "mark_attendance_synced", mark)
+
+    success, message = box.push()
+
+    assert success, message
+    assert server.requests == 2
+    assert len(server.batches) == 1
+    assert len(server.records) == 3
+    assert punches.get_unsynced_attendance() == []
+
+
+@pytest.mark.parametrize("status, fail_next", [(400, 1), (503, 3)])
+def test_rows_stay_unsynced_without_2xx(punches, server, status, fail_next):
+    server.fail_status = status
+    server.fail_next = fail_next
+    box = outbox(punches, server, max_retries=2)
+
+    success, _ = box.push()
+
+    assert not success
+    assert server.requests == fail_next
+    assert server.records == []
+    assert len(punches.get_unsynced_attendance()) == 3
+
+
+def test_unreachable_endpoint_keeps_rows(punches):
+    with FakeOutboxServer() as fake:
+        url = fake.url
+    box = AttendanceOutbox(punches, url, timeout=1, max_retries=0)
+
+    assert not box.push()[0]
+    assert len(punches.get_unsynced_attendance()) == 3
+
+
+def test_start_pushes_until_stopped(punches, server):
+    box = outbox(punches, server, poll_interval=0.05)
+    box.start()
+    try:
+        for _ in range(100):
+            if not punches.get_unsynced_attendance():
+                break
+            box._stop.wait(0.05)
+    finally:
+        box.stop()
+
+    assert len(server.records) == 3
+    assert not box._thread.is_alive()
+
+
+def test_outbox_from_environment(db):
+    assert outbox_from_environment(db, {}) is None
+
+    box = outbox_from_environment(
+        db,
+        {
+            "ATTENDANCE_OUTBOX_URL": "http://hr.example.com/punches",
+            "ATTENDANCE_OUTBOX_TOKEN": "secret",
+            "ATTENDANCE_OUTBOX_INTERVAL": "5",
+        },
+    )
+
+    assert box.endpoint == "http://hr.example.com/punches"
+    assert box.headers == {"Authorization": "Bearer secret"}
+    assert box.poll_interval == 5
@@ -0,0 +1,45 @@
+import socket
+
+import pytest
+
+from logic.reachability import check_reachable, is_reachable
+
+
+@pytest.fixture
+def listening():
+    """Address of a socket accepting connections."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(8)
+    yield sock.getsockname()
+    sock.close()
+
+
+@pytest.fixture
+def closed():
+    """Address of a port nothing listens on."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    address = sock.getsockname()
+    sock.close()
+    return address
+
+
+def test_checks_many_addresses_at_once(listening, closed):
+    assert check_reachable([listening, closed, listening]) == {
+        listening: True,
+        closed: False,
+    }
+
+
+def test_is_reachable(listening, closed):
+    assert is_reachable(*listening)
+    assert not is_reachable(*closed, timeout=0.1)
+
+
+def test_invalid_address_is_unreachable():
+    assert check_reachable([("256.0.0.1", 4370)]) == {("256.0.0.1", 4370): False}
+
+
+def test_no_addresses():
+    assert check_reachable([]) == {}
@@ -0,0 +1,49 @@
+import pytest
+
+NAMES = ["al@x", "Al@", "al[x", "al`", "ALA", "alb", "ak", "am", "Zed", "zz", "é"]
+
+
+def ascii_lower(text):
+    return "".join(c.lower() if c.isascii() else c for c in text)
+
+
+@pytest.fixture
+def users(db):
+    db.bulk_upsert_users(
+        [
+            {
+                "name": name,
+                "privilege": "User",
+                "password": "",
+                "user_id": user_id,
+                "group_id": user_id % 2,
+            }
+            for user_id, name in enumerate(NAMES, start=1)
+        ]
+    )
+    return db
+
+
+def search_all(db, **filters):
+    names, cursor = [], None
+    while True:
+        page, cursor = db.search_users(**filters, after=cursor, limit=2)
+        names += [user["name"] for user in page]
+        if cursor is None:
+            return names
+
+
+@pytest.mark.parametrize("prefix", ["al@", "AL@", "al", "al[", "al`", "z", "Z", "é"])
+def test_name_prefix_matches_nocase_prefix(users, prefix):
+    expected = {n for n in NAMES if ascii_lower(n).startswith(ascii_lower(prefix))}
+    assert set(search_all(users, name=prefix)) == expected
+
+
+def test_prefix_ending_in_at_sign_excludes_following_punctuation(users):
+    # '@' + 1 is 'A', which NOCASE would compare as 'a' and let '[' and '`' in
+    assert sorted(search_all(users, name="al@")) == ["Al@", "al@x"]
+
+
+def test_filters_combine(users):
+    assert search_all(users, name="al", group_id=0) == ["Al@", "al`", "alb"]
+    assert search_all(users, user_id=9) == ["Zed"]
@@ -0,0 +1,156 @@
+import time
+
+import pytest
+
+from logic import sync_engine
+from logic.circuit_breaker import device_breaker
+from logic.connection_pool import connection_pool
+from logic.device_status import DeviceStatusMonitor
+from logic.sync_engine import DeviceSyncEngine
+from simulator import FakeZKFleet
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_state():
+    """Start each test with a closed breaker and no pooled sessions."""
+    device_breaker._states.clear()
+    yield
+    connection_pool.close_all()
+    device_breaker._states.clear()
+
+
+def register(db, fleet):
+    """Register every device of the fleet and return their rows."""
+    for index, device in enumerate(fleet.devices):
+        db.insert_device(
+            {
+                "name": f"Device {index}",
+                "device_model": "F18",
+                "serial_number": f"SIM-{index}",
+                "ip": "127.0.0.1",
+                "port": device.port,
+            }
+        )
+    return db.get_devices()
+
+
+def test_reach_timeout_lets_slow_devices_through(db, monkeypatch):
+    check_reachable = sync_engine.check_reachable
+
+    def slow_network(addresses, timeout):
+        # As over a WAN link: connects take longer than the default deadline
+        addresses = list(addresses)
+        if timeout < 0.5:
+            return {address: False for address in addresses}
+        return check_reachable(addresses, timeout)
+
+    monkeypatch.setattr(sync_engine, "check_reachable", slow_network)
+    with FakeZKFleet(2, users=3, attendance=5) as fleet:
+        devices = register(db, fleet)
+
+        default = DeviceSyncEngine(db).run(devices)
+        device_breaker._states.clear()
+        patient = DeviceSyncEngine(db, reach_timeout=1).run(devices)
+
+    assert [r["message"] for r in default] == [
+        "Failed to connect: can't reach device (127.0.0.1)"
+    ] * 2
+    assert all(report["success"] for report in patient)
+
+
+def test_recovering_device_gets_a_single_trial(db):
+    with FakeZKFleet(1, users=3, attendance=5) as fleet:
+        devices = register(db, fleet)
+        address = ("127.0.0.1", fleet.devices[0].port)
+        device_breaker.record_failure(*address)
+        device_breaker.record_failure(*address)
+        device_breaker._states[address]["open_until"] = 0
+        # Half-open, and another caller holds the trial
+        assert device_breaker.allow(*address) == (True, 0)
+
+        (skipped,) = DeviceSyncEngine(db).run(devices)
+        monitor = DeviceStatusMonitor(db)
+        monitor.refresh(devices)
+        device_breaker.record_success(*address)
+        (synced,) = DeviceSyncEngine(db).run(devices)
+
+    assert skipped["message"] == "Skipped: device is being retried elsewhere."
+    assert monitor.get_statuses(devices, refresh=False) == {address: None}
+    assert synced["success"]
+
+
+def test_failed_trial_reopens_circuit(db):
+    with FakeZKFleet(1, dead_count=1) as fleet:
+        devices = register(db, fleet)
+        address = ("127.0.0.1", fleet.devices[0].port)
+        device_breaker.record_failure(*address)
+        device_breaker.record_failure(*address)
+        device_breaker._states[address]["open_until"] = 0
+
+        (report,) = DeviceSyncEngine(db).run(devices)
+
+    assert report["message"] == "Failed to connect: can't reach device (127.0.0.1)"
+    assert device_breaker.retry_in(*address) > 15
+
+
+def test_devices_are_synced_concurrently(db):
+    events = []
+    with FakeZKFleet(
+        4, distinct_users=True, users=3, attendance=5, latency=0.02
+    ) as fleet:
+        devices = register(db, fleet)
+
+        reports = DeviceSyncEngine(db, max_workers=4).run(devices, events.append)
+
+    assert all(report["success"] for report in reports)
+    assert [report["attendance"][0] for report in reports] == [True] * 4
+    assert db.count_users() == 12
+    # Every device was started before the first one finished
+    kinds = [event["event"] for event in events]
+    assert kinds.index("device_finished") > max(
+        i for i, kind in enumerate(kinds) if kind == "device_started"
+    )
+
+
+def test_hung_device_times_out_without_blocking_the_others(db):
+    with FakeZKFleet(3, dead_count=1, dead="silent", users=3, attendance=5) as fleet:
+        devices = register(db, fleet)
+        hung = next(i for i, device in enumerate(fleet.devices) if device.dead)
+
+        start = time.monotonic()
+        reports = DeviceSyncEngine(db, device_timeout=1).run(devices)
+        elapsed = time.monotonic() - start
+
+    assert reports[hung]["message"] == "Timed out after 1 seconds."
+    assert all(r["success"] for i, r in enumerate(reports) if i != hung)
+    # Well under the 5 s the hung connect itself takes to fail
+    assert elapsed < 3
+    assert device_breaker._states[("127.0.0.1", fleet.devices[hung].port)]
+
+
+def test_dead_devices_are_reported_without_a_worker(db, monkeypatch):
+    events = []
+    workers = []
+    sync_device = DeviceSyncEngine.sync_device
+
+    def counted_sync_device(self, device, *args, **kwargs):
+        workers.append(device["name"])
+        return sync_device(self, device, *args, **kwargs)
+
+    monkeypatch.setattr(DeviceSyncEngine, "sync_device", counted_sync_device)
+    with FakeZKFleet(3, dead_count=2, users=3, attendance=5) as fleet:
+        devices = register(db, fleet)
+
+        reports = DeviceSyncEngine(db).run(devices, events.append)
+
+    dead = [d["name"] for d, f in zip(devices, fleet.devices) if f.dead]
+    assert len(dead) == 2
+    assert workers == [d["name"] for d in devices if d["name"] not in dead]
+    for device, report in zip(devices, reports):
+        if device["name"] in dead:
+            assert report["message"] == (
+                "Failed to connect: can't reach device (127.0.0.1)"
+            )
+            assert [e["event"] for e in events if e["name"] == device["name"]] == [
+                "device_finished"
+            ]
@@ -0,0 +1,131 @@
+from logic import sync_progress
+from logic.circuit_breaker import device_breaker
+from logic.sync_engine import DeviceSyncEngine
+from logic.sync_progress import SyncProgress, device_progress
+from simulator import FakeZKDevice
+
+DEVICE = {"id": 1, "name": "Front door", "ip": "10.0.0.1", "port": 4370}
+
+
+def clocked(monkeypatch, *times):
+    """Make `device_progress` stamp events with the given times, in order."""
+    ticks = iter(times)
+    monkeypatch.setattr(sync_progress.time, "monotonic", lambda: next(ticks))
+
+
+def test_devices_wait_until_their_first_event():
+    progress = SyncProgress([DEVICE])
+
+    (summary,) = progress.snapshot()
+
+    assert summary["status"] == "waiting"
+    assert summary["started"] is None
+    assert summary["rows_per_second"] == 0.0
+
+
+def test_events_fold_into_summary(monkeypatch):
+    progress = SyncProgress([DEVICE])
+    emit = device_progress(DEVICE, progress)
+    clocked(monkeypatch, 100.0, 101.0, 102.0, 104.0, 105.0)
+
+    emit("device_started")
+    emit("users_pulled", success=True, message="ok", users=5)
+    emit("attendance_decoded", rows=300)
+    emit("attendance_inserted", rows=250)
+    (running,) = progress.snapshot()
+    emit("device_finished", success=True, message="Connected.", duration=5.0)
+    (finished,) = progress.snapshot()
+
+    assert running["status"] == "syncing"
+    assert (running["users"], running["decoded"], running["inserted"]) == (
+        5,
+        300,
+        250,
+    )
+    # 300 decoded in the 4 s since the start
+    assert running["rows_per_second"] == 75.0
+    assert finished["status"] == "done"
+    assert finished["message"] == "Connected."
+    # Once finished the rate uses the reported duration
+    assert finished["rows_per_second"] == 60.0
+
+
+def test_failed_device_is_reported_failed():
+    progress = SyncProgress()
+    emit = device_progress(DEVICE, progress)
+
+    emit("device_finished", success=False, message="Timed out.", duration=60.0)
+
+    (summary,) = progress.snapshot()
+    assert summary["status"] == "failed"
+    assert summary["message"] == "Timed out."
+    assert summary["started"] is None
+
+
+def test_events_after_device_finished_are_dropped():
+    progress = SyncProgress()
+    emit = device_progress(DEVICE, progress)
+    emit("device_started")
+    emit("device_finished", success=False, message="Timed out.", duration=1.0)
+
+    # The abandoned worker carries on
+    emit("attendance_decoded", rows=100)
+    emit("device_finished", success=True, message="Connected.", duration=9.0)
+
+    (summary,) = progress.snapshot()
+    assert summary["status"] == "failed"
+    assert summary["decoded"] == 0
+    assert summary["duration"] == 1.0
+
+
+def test_without_callback_nothing_is_emitted():
+    device_progress(DEVICE, None)("device_started")
+
+
+def test_snapshot_is_a_copy():
+    progress = SyncProgress([DEVICE])
+
+    progress.snapshot()[0]["status"] = "done"
+
+    assert progress.snapshot()[0]["status"] == "waiting"
+
+
+def test_skipped_devices_get_device_finished(db):
+    device_breaker._states.clear()
+    device_breaker.record_failure(DEVICE["ip"], DEVICE["port"])
+    device_breaker.record_failure(DEVICE["ip"], DEVICE["port"])
+    progress = SyncProgress([DEVICE])
+    try:
+        (report,) = DeviceSyncEngine(db).run([DEVICE], progress)
+    finally:
+        device_breaker._states.clear()
+
+    (summary,) = progress.snapshot()
+    assert summary["status"] == "failed"
+    assert summary["message"] == report["message"]
+    assert report["message"].startswith("Skipped: device keeps failing")
+
+
+def test_timed_out_devices_get_device_finished(db):
+    device_breaker._states.clear()
+    with FakeZKDevice(dead="silent") as fake:
+        db.insert_device(
+            {
+                "name": "Hung",
+                "device_model": "F18",
+                "serial_number": "SIM-1",
+                "ip": "127.0.0.1",
+                "port": fake.port,
+            }
+        )
+        devices = db.get_devices()
+        progress = SyncProgress(devices)
+        try:
+            DeviceSyncEngine(db, device_timeout=1).run(devices, progress)
+        finally:
+            device_breaker._states.clear()
+
+    (summary,) = progress.snapshot()
+    assert summary["status"] == "failed"
+    assert summary["message"] == "Timed out after 1 seconds."
+    assert summary["duration"] >= 1
@@ -0,0 +1,141 @@
+import struct
+from datetime import datetime
+
+import pytest
+from zk import ZK, const
+
+from logic.zk_decoder import decode_user_columns, iter_attendance
+
+# 2024-03-15 09:30:45 as the device packs it
+TIME = bytes.fromhex("c5075f2e")
+TIMESTAMP = datetime(2024, 3, 15, 9, 30, 45)
+
+USER_RECORDS = {
+    28: (
+        b"\x07\x00"  # uid 7
+        + b"\x00"  # privilege
+        + b"12\x00\x00\x00"  # password
+        + b"Bo\x00\x00\x00\x00\x00\x00"  # name
+        + b"\x63\x00\x00\x00"  # card 99
+        + b"\x00"
+        + b"\x01"  # group 1
+        + b"\x00\x00"  # timezone
+        + b"\xef\x03\x00\x00"  # user_id 1007
+    ),
+    72: (
+        b"\x07\x00"  # uid 7
+        + b"\x0e"  # privilege 14 (admin)
+        + b"123".ljust(8, b"\x00")  # password
+        + b"Ana".ljust(24, b"\x00")  # name
+        + b"\x92\x10\x00\x00"  # card 4242
+        + b"\x00"
+        + b"2".ljust(7, b"\x00")  # group
+        + b"\x00"
+        + b"1007".ljust(24, b"\x00")  # user_id
+    ),
+}
+ATTENDANCE_RECORDS = {
+    8: (
+        b"\x07\x00"  # uid 7
+        + b"\x01"  # status
+        + TIME
+        + b"\x00"  # punch
+    ),
+    16: (
+        b"\xef\x03\x00\x00"  # user_id 1007
+        + TIME
+        + b"\x00"  # status
+        + b"\x01"  # punch
+        + b"\x00\x00"
+        + b"\x00\x00\x00\x00"  # workcode
+    ),
+    40: (
+        b"\x07\x00"  # uid 7
+        + b"1007".ljust(24, b"\x00")  # user_id
+        + b"\x01"  # status
+        + TIME
+        + b"\x04"  # punch
+        + b" " * 8
+    ),
+}
+EXPECTED_ATTENDANCE = {
+    8: ("1007", TIMESTAMP, 1, 0, 7),
+    16: ("1007", TIMESTAMP, 0, 1, 7),
+    40: ("1007", TIMESTAMP, 1, 4, 7),
+}
+EXPECTED_USERS = {
+    28: {
+        "uid": 7,
+        "privilege": 0,
+        "password": "12",
+        "name": "Bo",
+        "card": 99,
+        "group_id": "1",
+        "user_id": "1007",
+    },
+    72: {
+        "uid": 7,
+        "privilege": 14,
+        "password": "123",
+        "name": "Ana",
+        "card": 4242,
+        "group_id": "2",
+        "user_id": "1007",
+    },
+}
+
+
+def buffer(record):
+    """Wrap one record the way `read_with_buffer` returns it."""
+    return struct.pack("<I", len(record)) + record
+
+
+def pyzk_reading(users, attendance=b""):
+    """A pyzk ZK instance whose reads return the given buffers."""
+    zk = ZK("127.0.0.1")
+    zk.users, zk.records = 1, 1 if attendance else 0
+    zk.read_sizes = lambda: True
+    buffers = {const.CMD_USERTEMP_RRQ: users, const.CMD_ATTLOG_RRQ: attendance}
+    zk.read_with_buffer = lambda command, fct=0, ext=0: (
+        buffers[command],
+        len(buffers[command]),
+    )
+    return zk
+
+
+@pytest.mark.parametrize("size", sorted(USER_RECORDS))
+def test_users_match_pyzk(size):
+    data = buffer(USER_RECORDS[size])
+
+    columns = decode_user_columns(data, 1)
+    (user,) = pyzk_reading(data).get_users()
+
+    decoded = {name: values[0] for name, values in columns.items()}
+    assert decoded == EXPECTED_USERS[size]
+    assert decoded == {name: getattr(user, name) for name in decoded}
+
+
+@pytest.mark.parametrize("size", sorted(ATTENDANCE_RECORDS))
+def test_attendance_matches_pyzk(size):
+    users = buffer(USER_RECORDS[72])
+    data = buffer(ATTENDANCE_RECORDS[size])
+
+    (record,) = iter_attendance(data, 1, uid_map={7: "1007"})
+    (attendance,) = pyzk_reading(users, data).get_attendance()
+
+    assert tuple(record) == EXPECTED_ATTENDANCE[size]
+    assert tuple(record) == tuple(getattr(attendance, name) for name in record._fields)
+
+
+def test_unknown_user_id_is_kept_in_16_byte_records():
+    # user_id 7 is not enrolled, while uid 7 belongs to user_id 1007
+    users = buffer(USER_RECORDS[72])
+    data = buffer(b"\x07\x00\x00\x00" + ATTENDANCE_RECORDS[16][4:])
+
+    (record,) = iter_attendance(data, 1, uid_map={7: "1007"})
+    (attendance,) = pyzk_reading(users, data).get_attendance()
+
+    assert tuple(record) == ("7", TIMESTAMP, 0, 1, 7)
+    assert record.user_id == attendance.user_id
+    # pyzk leaves the unresolved uid as a string
+    assert str(record.uid) == attendance.uid
@@ -11,9 +11,10 @@ from ui.utils.theme_utils import (
 
 
 class SettingsWindow:
-    def __init__(self, root, navigate):
+    def __init__(self, root, navigate, tasks):
         self.root = root
         self.navigate = navigate
+        self.tasks = tasks
         self.db_manager = DatabaseManager()
         self.setup_ui()
 
@@ -39,10 +40,16 @@ class SettingsWindow:
         self.setup_button.place(relx=0.5, rely=0.5, anchor="center")
 
     def handle_setup(self):
-        success, message = self.db_manager.initialize_tables()
+        self.setup_button.config(state="disabled")
+        self.tasks.submit(self.db_manager.initialize_tables, on_success=self.setup_done)
+
+    def setup_done(self, result):
+        success, message = result
         messagebox.showinfo("Success" if success else "Error", message)
         if success:
             self.go_to_dashboard()
+        else:
+            self.setup_button.config(state="normal")
 
     def go_to_dashboard(self):
         if self.navigate:
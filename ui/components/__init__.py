@@ -8,6 +8,7 @@ from ui.components.layout import (
     create_labeled_dropdown,
     create_labeled_entry,
 )
+from ui.components.virtual_table import VirtualTable
 
 __all__ = [
     "create_header",
@@ -18,4 +19,5 @@ __all__ = [
     "create_label_entry_row",
     "create_labeled_entry",
     "create_labeled_dropdown",
+    "VirtualTable",
 ]
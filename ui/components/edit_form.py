@@ -15,6 +15,7 @@ class DynamicEditForm:
         save_callback,
         draw_table_callback,
         dropdown_options=None,
+        tasks=None,
     ):
         """
         Initialize a dynamic edit form.
@@ -26,6 +27,7 @@ class DynamicEditForm:
             data: Dictionary containing current data to edit
             save_callback: Function to call when saving (takes dict of updated values)
             dropdown_options: Dict of {key: options_list} for dropdown fields
+            tasks: Optional TaskRunner that runs save_callback off the main thread
         """
         self.window = tk.Toplevel(parent)
         self.window.title("ZkTeco Connector Made By Riajul Kashem")
@@ -33,6 +35,7 @@ class DynamicEditForm:
         self.save_callback = save_callback
         self.draw_table_callback = draw_table_callback
         self.dropdown_options = dropdown_options or {}
+        self.tasks = tasks
 
         # Create main frame
         self.frame = tk.Frame(self.window, bg=WHITE_COLOR)
@@ -56,8 +59,8 @@ class DynamicEditForm:
         self.create_form_fields(config, data)
 
         # Add save button
-        button = create_button(self.frame, text="Save", command=self.save)
-        button.grid(row=len(config) * 2 + 1, column=0, pady=15)
+        self.save_button = create_button(self.frame, text="Save", command=self.save)
+        self.save_button.grid(row=len(config) * 2 + 1, column=0, pady=15)
 
     def create_form_fields(self, config, data):
         """Create form fields based on configuration."""
@@ -103,8 +106,24 @@ class DynamicEditForm:
                 else widget.get()
             )
             updated_values[key] = value
-        success, message = self.save_callback(updated_values)
+        if self.tasks is None:
+            return self.saved(self.save_callback(updated_values))
+        # Disabled until the save returns, so it can't be submitted twice
+        self.save_button.config(state="disabled")
+        self.tasks.submit(
+            self.save_callback,
+            updated_values,
+            on_success=self.saved,
+            on_error=lambda e: self.saved((False, f"Failed to save: {e}")),
+        )
+
+    def saved(self, result):
+        """Close the form and redraw the table once save_callback succeeded."""
+        success, message = result
         if success:
-            self.window.destroy()
+            if self.window.winfo_exists():
+                self.window.destroy()
             self.draw_table_callback()
+        elif self.window.winfo_exists():
+            self.save_button.config(state="normal")
         messagebox.showinfo("Success" if success else "Error", message)
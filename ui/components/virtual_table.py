@@ -0,0 +1,230 @@
+import tkinter as tk
+
+from ui.components.layout import create_icon_button, create_table_headers
+from ui.utils.theme_utils import WHITE_COLOR
+
+
+class VirtualTable:
+    """Table that only builds widgets for the rows on screen.
+
+    A fixed pool of `height` rows is created once; scrolling rewrites their
+    text instead of creating new widgets, so drawing costs the same for ten
+    rows or fifty thousand. Rows are plain dicts held in memory; with
+    `fetch_page` they are loaded a page at a time as the user scrolls.
+    """
+
+    def __init__(
+        self,
+        parent,
+        columns,
+        actions=None,
+        key="id",
+        height=15,
+        fetch_page=None,
+        tasks=None,
+    ):
+        """Initialize the table inside `parent`, which it lays out with grid.
+
+        Args:
+            parent (tk.Widget): Frame the table is drawn in.
+            columns (list): (row key, heading) pairs, one per column.
+            actions (list, optional): (icon, callback) pairs shown on every
+                row; callbacks receive the row's primary key.
+            key (str): Row key holding the primary key (default: 'id').
+            height (int): Number of visible rows (default: 15).
+            fetch_page (callable, optional): fetch_page(cursor) returning
+                (rows, next_cursor), next_cursor None on the last page. Called
+                with None by `reload` and again whenever the user scrolls near
+                the end of what has been loaded.
+            tasks (TaskRunner, optional): Runs `fetch_page` off the main
+                thread; the table shows a loading row until the page arrives.
+        """
+        self.parent = parent
+        self.columns = columns
+        self.actions = actions or []
+        self.key = key
+        self.height = height
+        self.fetch_page = fetch_page
+        self.tasks = tasks
+        self.rows = []
+        self.offset = 0
+        self._cursor = None
+        self._positions = {}  # Primary key -> index in rows
+        self._loading = False
+        self._generation = 0  # Bumped on reset so stale pages are dropped
+        self._row_widgets = []  # (labels, actions frame) per visible row
+
+        headings = [heading for _, heading in columns]
+        if self.actions:
+            headings.append("Actions")
+        create_table_headers(parent, headings)
+
+        for row in range(1, height + 1):
+            labels = []
+            for col in range(len(columns)):
+                label = tk.Label(
+                    parent, bg=WHITE_COLOR, relief="solid", padx=10, pady=5
+                )
+                label.grid(row=row, column=col, sticky="nsew")
+                labels.append(label)
+
+            actions_frame = None
+            if self.actions:
+                actions_frame = tk.Frame(parent, bg=WHITE_COLOR, relief="solid")
+                actions_frame.grid(row=row, column=len(columns), sticky="nsew")
+                for icon, callback in self.actions:
+                    create_icon_button(
+                        parent=actions_frame,
+                        icon=icon,
+                        command=lambda r=row - 1, c=callback: self._on_action(r, c),
+                    )
+            self._row_widgets.append((labels, actions_frame))
+            for widget in labels + ([actions_frame] if actions_frame else []):
+                self._bind_wheel(widget)
+
+        self.scrollbar = tk.Scrollbar(parent, orient="vertical", command=self._scroll)
+        self.scrollbar.grid(row=1, column=len(headings), rowspan=height, sticky="ns")
+        self._render()
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda e: self.scroll(-1))
+        widget.bind("<Button-5>", lambda e: self.scroll(1))
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+
+    def _on_action(self, index, callback):
+        index += self.offset
+        if index < len(self.rows):
+            callback(self.rows[index][self.key])
+
+    def _scroll(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, what)."""
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            step = self.height if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def scroll(self, rows):
+        """Scroll by a number of rows, negative for up."""
+        self.scroll_to(self.offset + rows)
+
+    def scroll_to(self, offset):
+        """Make the row at `offset` the first visible one."""
+        offset = max(0, min(offset, len(self.rows) - self.height))
+        if offset != self.offset:
+            self.offset = offset
+            self._render()
+        self._top_up()
+
+    def _top_up(self):
+        """Fetch the next page once the user gets within a screen of the end."""
+        if self._cursor is not None and self.offset + 2 * self.height >= len(self.rows):
+            self._load_page()
+
+    def _load_page(self):
+        if self._loading:
+            return
+        self._loading = True
+        generation = self._generation
+        if self.tasks is None:
+            self._add_page(self.fetch_page(self._cursor), generation)
+            return
+        self._render()
+        self.tasks.submit(
+            self.fetch_page,
+            self._cursor,
+            on_success=lambda page: self._add_page(page, generation),
+            on_error=lambda error: self._page_failed(error, generation),
+        )
+
+    def _add_page(self, page, generation):
+        if generation != self._generation or not self.parent.winfo_exists():
+            return
+        self._loading = False
+        rows, self._cursor = page
+        for row in rows:
+            self._positions[row[self.key]] = len(self.rows)
+            self.rows.append(row)
+        self._render()
+        self._top_up()
+
+    def _page_failed(self, error, generation):
+        if generation != self._generation or not self.parent.winfo_exists():
+            return
+        self._loading = False
+        self._render()
+        print(f"Failed to load table rows: {error}")
+
+    def _render(self):
+        for index, (labels, actions_frame) in enumerate(self._row_widgets):
+            index += self.offset
+            row = self.rows[index] if index < len(self.rows) else None
+            for label, (column, _) in zip(labels, self.columns):
+                value = None if row is None else row.get(column)
+                if index == 0 and row is None and self._loading:
+                    value = "Loading..." if label is labels[0] else None
+                # text=None would leave the recycled label's old text in place
+                label.config(text="" if value is None else value)
+            if actions_frame is not None:
+                if row is None:
+                    actions_frame.grid_remove()
+                else:
+                    actions_frame.grid()
+
+        self._render_scrollbar()
+
+    def _render_scrollbar(self):
+        total = len(self.rows)
+        if total <= self.height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.height) / total)
+
+    def set_rows(self, rows):
+        """Replace every row and scroll back to the top."""
+        self.rows = list(rows)
+        self._positions = {row[self.key]: i for i, row in enumerate(self.rows)}
+        self._cursor = None
+        self._loading = False
+        self._generation += 1
+        self.offset = 0
+        self._render()
+
+    def reload(self):
+        """Drop the loaded rows and fetch the first page again."""
+        self.set_rows([])
+        self._load_page()
+
+    def upsert_row(self, row):
+        """Update the row with the same primary key in place, or add it.
+
+        New rows go at the end; while more pages remain to be fetched they
+        are left for the page that holds them instead.
+        """
+        key = row[self.key]
+        index = self._positions.get(key)
+        if index is None:
+            if self._cursor is not None:
+                return
+            index = self._positions[key] = len(self.rows)
+            self.rows.append(row)
+        else:
+            self.rows[index] = row
+        if self.offset <= index < self.offset + self.height:
+            self._render()
+        else:
+            # Off screen: only the scrollbar may need to change
+            self._render_scrollbar()
+
+    def remove_row(self, key):
+        """Remove the row with primary key `key`, if it is loaded."""
+        index = self._positions.pop(key, None)
+        if index is None:
+            return
+        del self.rows[index]
+        for position in range(index, len(self.rows)):
+            self._positions[self.rows[position][self.key]] = position
+        self.offset = max(0, min(self.offset, len(self.rows) - self.height))
+        self._render()
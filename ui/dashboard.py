@@ -1,8 +1,8 @@
-import threading
 import tkinter as tk
 from tkinter import messagebox
 
-from ui.components import create_header, create_button, create_card
+from logic.sync_progress import SyncProgress
+from ui.components import create_header, create_button, create_card, VirtualTable
 from ui.utils.theme_utils import (
     GREEN_COLOUR,
     WHITE_COLOR,
@@ -10,13 +10,18 @@ from ui.utils.theme_utils import (
     DEFAULT_SCREEN_SIZE,
 )
 
+# Cards are redrawn this often so background device probes show up
+CARD_REFRESH_MS = 5000
+
 
 class DashboardUI:
-    def __init__(self, root, logic, navigate):
+    def __init__(self, root, logic, navigate, tasks):
         self.root = root
         self.navigate = navigate
         self.logic = logic
+        self.tasks = tasks
         self.is_syncing = False
+        self.cards_loading = False
         self.animation_chars = ["|", "/", "-", "\\"]
         self.animation_index = 0
         self.setup_ui()
@@ -36,7 +41,31 @@ class DashboardUI:
             self.stats_frame.grid_columnconfigure(i, weight=1)
             self.stats_frame.grid_rowconfigure(i, weight=1)
 
-        self.update_cards()
+        tk.Label(
+            self.stats_frame,
+            text="Loading...",
+            font=(FONT_HELVETICA, 10),
+            bg=WHITE_COLOR,
+        ).grid(row=0, column=0, columnspan=2)
+        self.refresh_cards()
+
+        # Live per-device progress of the running (or last) sync
+        self.progress = SyncProgress()
+        self.progress_frame = tk.Frame(self.root, bg=WHITE_COLOR)
+        self.progress_frame.pack(fill="x", padx=10)
+        self.progress_table = VirtualTable(
+            self.progress_frame,
+            columns=[
+                ("name", "Device"),
+                ("status", "Status"),
+                ("users", "Users"),
+                ("inserted", "New Records"),
+                ("rows_per_second", "Records/s"),
+                ("duration", "Time (s)"),
+            ],
+            key="device_id",
+            height=3,
+        )
 
         # Buttons
         self.button_frame = tk.Frame(self.root, bg=GREEN_COLOUR)
@@ -64,11 +93,29 @@ class DashboardUI:
         )
         self.sync_status_label.pack(pady=5)
 
-    def update_cards(self):
+    def load_cards(self):
+        """Fetch the card data in the background and redraw the cards with it."""
+        if self.cards_loading:
+            return
+        self.cards_loading = True
+
+        def loaded(cards):
+            self.cards_loading = False
+            self.update_cards(cards)
+
+        def failed(error):
+            self.cards_loading = False
+            print(f"Failed to load dashboard cards: {error}")
+
+        self.tasks.submit(self.logic.get_card_data, on_success=loaded, on_error=failed)
+
+    def update_cards(self, cards):
+        if not self.stats_frame.winfo_exists():
+            return
         for widget in self.stats_frame.winfo_children():
             widget.destroy()
 
-        for card in self.logic.get_card_data():
+        for card in cards:
             create_card(
                 parent=self.stats_frame,
                 label=card["label"],
@@ -79,10 +126,18 @@ class DashboardUI:
                 font_size=card["font_size"],
             )
 
+    def refresh_cards(self):
+        """Reload the cards now and keep doing so while the screen is shown."""
+        if not self.stats_frame.winfo_exists():
+            return
+        self.load_cards()
+        self.root.after(CARD_REFRESH_MS, self.refresh_cards)
+
     def animate_sync(self):
         """Update sync status label with rotating animation."""
-        if not self.is_syncing:
+        if not self.is_syncing or not self.sync_status_label.winfo_exists():
             return
+        self.update_progress()
         char = self.animation_chars[self.animation_index]
         self.sync_status_label.config(text=f"Syncing... {char}")
         self.animation_index = (self.animation_index + 1) % len(self.animation_chars)
@@ -94,33 +149,39 @@ class DashboardUI:
             return
 
         self.is_syncing = True
+        self.progress = SyncProgress()
+        self.progress_table.set_rows([])
         self.animate_sync()
 
-        def sync_and_update():
-            try:
-                sync_time = self.logic.sync_data()
-                self.root.after(0, lambda: self.post_sync(sync_time))
-            except Exception:
-                self.root.after(
-                    0,
-                    lambda: messagebox.showerror(
-                        "Sync Error", f"Failed to sync: {str(e)}"
-                    ),
-                )
-                self.root.after(0, lambda: self.post_sync(None))
-
-        threading.Thread(target=sync_and_update, daemon=True).start()
+        def failed(error):
+            messagebox.showerror("Sync Error", f"Failed to sync: {str(error)}")
+            self.post_sync(None)
+
+        self.tasks.submit(
+            self.logic.sync_data,
+            self.progress,
+            on_success=self.post_sync,
+            on_error=failed,
+        )
+
+    def update_progress(self):
+        """Copy the latest per-device sync progress into the progress table."""
+        for summary in self.progress.snapshot():
+            self.progress_table.upsert_row(summary)
 
     def post_sync(self, sync_time):
         """Update UI after sync completes."""
         self.is_syncing = False
+        if not self.sync_status_label.winfo_exists():
+            return
+        self.update_progress()
         if sync_time:
             self.sync_status_label.config(text=f"Last Synced: {sync_time}")
             messagebox.showinfo(
                 "Sync",
                 "Data synced successfully! Go to the User Management screen to view updated users.",
             )
-            self.update_cards()
+            self.load_cards()
         else:
             self.sync_status_label.config(
                 text="Last Synced: Failed", bg="red", fg="white"
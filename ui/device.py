@@ -4,19 +4,19 @@ from tkinter import messagebox
 from ui.components import (
     create_header,
     create_label_entry_row,
-    create_table_headers,
     create_button,
+    VirtualTable,
 )
 from ui.components.edit_form import DynamicEditForm
-from ui.components.layout import create_icon_button
 from ui.utils.theme_utils import WHITE_COLOR, BIG_SCREEN_SIZE
 
 
 class DeviceManagementUI:
-    def __init__(self, root, logic, navigate):
+    def __init__(self, root, logic, navigate, tasks):
         self.root = root
         self.navigate = navigate
         self.logic = logic
+        self.tasks = tasks
         self.form_fields = {}  # Field name -> Entry widget
         self.columns = ["name", "ip", "port", "device_model", "serial_number"]
         self.setup_ui()
@@ -50,11 +50,13 @@ class DeviceManagementUI:
         self.table_frame = tk.Frame(self.root, bg=WHITE_COLOR)
         self.table_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        create_table_headers(
+        self.table = VirtualTable(
             self.table_frame,
-            ["ID"]
-            + [col.replace("_", " ").title() for col in self.columns]
-            + ["Actions"],
+            columns=[("id", "ID")]
+            + [(col, col.replace("_", " ").title()) for col in self.columns],
+            actions=[("✏️", self.edit_device), ("🗑️", self.delete_device)],
+            fetch_page=lambda cursor: (self.logic.get_devices(), None),
+            tasks=self.tasks,
         )
 
         # Navigation section
@@ -68,65 +70,34 @@ class DeviceManagementUI:
         self.display_devices()
 
     def display_devices(self):
-        for widget in self.table_frame.winfo_children():
-            if widget.grid_info().get("row", 0) > 0:
-                widget.destroy()
-
-        devices = self.logic.get_devices()
-        for row, device in enumerate(devices, start=1):
-            # Static ID column
-            tk.Label(
-                self.table_frame,
-                text=device["id"],
-                bg=WHITE_COLOR,
-                relief="solid",
-                padx=10,
-                pady=5,
-            ).grid(row=row, column=0, sticky="nsew")
-
-            # Dynamic fields
-            for col_index, col_name in enumerate(self.columns, start=1):
-                tk.Label(
-                    self.table_frame,
-                    text=device.get(col_name, ""),
-                    bg=WHITE_COLOR,
-                    relief="solid",
-                    padx=10,
-                    pady=5,
-                ).grid(row=row, column=col_index, sticky="nsew")
-
-            # Action buttons
-            actions_frame = tk.Frame(self.table_frame, bg=WHITE_COLOR, relief="solid")
-            actions_frame.grid(row=row, column=len(self.columns) + 1, sticky="nsew")
-
-            create_icon_button(
-                parent=actions_frame,
-                icon="✏️",
-                command=lambda idx=device["id"]: self.edit_device(idx),
-            )
-
-            create_icon_button(
-                parent=actions_frame,
-                icon="🗑️",
-                command=lambda idx=device["id"]: self.delete_device(idx),
-            )
+        self.table.reload()
+
+    def refresh_device(self, device_id):
+        """Redraw one device's row from the database instead of the whole table."""
+
+        def loaded(device):
+            if device:
+                self.table.upsert_row(device)
+            else:
+                self.table.remove_row(device_id)
+
+        self.tasks.submit(self.logic.get_device, device_id, on_success=loaded)
 
     def handle_add_device(self):
         values = {field: entry.get() for field, entry in self.form_fields.items()}
-        success, message = self.logic.add_device(**values)
+        self.tasks.submit(self.logic.add_device, **values, on_success=self.device_added)
 
+    def device_added(self, result):
+        success, message = result
         if success:
             for entry in self.form_fields.values():
                 entry.delete(0, tk.END)
-            self.display_devices()
+            self.refresh_device(message)
 
         messagebox.showinfo("Success" if success else "Error", message)
 
     def edit_device(self, device_id):
-        self.display_devices()  # Refresh device list
-        device = next(
-            (d for d in self.logic.get_devices() if d["id"] == device_id), None
-        )
+        device = next((d for d in self.table.rows if d["id"] == device_id), None)
         if not device:
             return messagebox.showerror("Error", "Device not found.")
 
@@ -136,7 +107,16 @@ class DeviceManagementUI:
             {"label": "Serial Number:", "key": "serial_number"},
             {"label": "IP:", "key": "ip"},
             {"label": "Port:", "key": "port"},
+            {
+                "label": "Clear Log After Sync:",
+                "key": "clear_after_ingest",
+                "type": "dropdown",
+                "options": ["No", "Yes"],
+            },
         ]
+        data = dict(
+            device, clear_after_ingest="Yes" if device["clear_after_ingest"] else "No"
+        )
 
         def save_callback(values):
             # Validate required fields
@@ -150,29 +130,31 @@ class DeviceManagementUI:
             except ValueError:
                 return False, "Port must be a number."
 
-            success, message = self.logic.edit_device(device_id, **values)
-            if success:
-                self.display_devices()
-            return success, message
+            return self.logic.edit_device(device_id, **values)
 
         DynamicEditForm(
             parent=self.root,
             title="Edit Device",
             config=config,
-            data=device,
+            data=data,
             save_callback=save_callback,
-            draw_table_callback=self.display_devices,
+            draw_table_callback=lambda: self.refresh_device(device_id),
             dropdown_options={},
+            tasks=self.tasks,
         )
 
     def delete_device(self, device_id):
         if messagebox.askyesno(
             "Confirm", "Are you sure you want to delete this device?"
         ):
-            success, message = self.logic.delete_device(device_id)
-            if success:
-                self.display_devices()
-            messagebox.showinfo("Success" if success else "Error", message)
+
+            def deleted(result):
+                success, message = result
+                if success:
+                    self.table.remove_row(device_id)
+                messagebox.showinfo("Success" if success else "Error", message)
+
+            self.tasks.submit(self.logic.delete_device, device_id, on_success=deleted)
 
     def go_back(self):
         if self.navigate:
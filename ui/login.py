@@ -12,9 +12,10 @@ from ui.utils.theme_utils import (
 
 
 class LoginWindow:
-    def __init__(self, root, navigate):
+    def __init__(self, root, navigate, tasks):
         self.root = root
         self.navigate = navigate
+        self.tasks = tasks
         self.setup_ui()
 
     def setup_ui(self):
@@ -94,17 +95,21 @@ class LoginWindow:
 
     def check_database(self):
         # Try connecting and checking for expected table
-        try:
+        def check():
             db = DatabaseManager()
             # We'll check if the 'users' table has at least one user
-            users = db.get_users()
+            users, _ = db.get_users_page(limit=1)
             print("users: ", users)
-            self.go_to_dashboard()
-        except Exception as e:
+
+        def failed(e):
             # Unexpected error, still redirect
             print("Unexpected DB issue:", str(e))
             self.redirect_to_settings()
 
+        self.tasks.submit(
+            check, on_success=lambda _: self.go_to_dashboard(), on_error=failed
+        )
+
     def handle_login(self):
         email = self.email_entry.get()
         password = self.password_entry.get()
@@ -5,10 +5,9 @@ from ui.components import (
     create_header,
     create_dropdown,
     create_label_entry_row,
-    create_table_headers,
+    VirtualTable,
 )
 from ui.components.edit_form import DynamicEditForm
-from ui.components.layout import create_icon_button
 from ui.utils.theme_utils import (
     GREEN_COLOUR,
     WHITE_COLOR,
@@ -16,13 +15,21 @@ from ui.utils.theme_utils import (
     BIG_SCREEN_SIZE,
 )
 
+# Users fetched per page as the table is scrolled
+USERS_PAGE = 200
+# Quiet time after the last keystroke before a search is sent
+SEARCH_DEBOUNCE_MS = 300
+
 
 class UserManagementUI:
-    def __init__(self, root, logic, navigate):
+    def __init__(self, root, logic, navigate, tasks):
         self.root = root
         self.navigate = navigate
         self.logic = logic
+        self.tasks = tasks
         self.device_map = {}
+        self.search_job = None
+        self.filters = None  # Filters the table was last loaded with
         self.setup_ui()
 
     def setup_ui(self):
@@ -42,10 +49,9 @@ class UserManagementUI:
         self.user_id_entry = tk.Entry(self.input_frame, width=10)
         self.group_id_entry = tk.Entry(self.input_frame, width=10)
 
-        devices = self.logic.get_devices()
-        self.device_map = {d["name"]: d["id"] for d in devices}
+        # Filled in by set_devices once the device list has loaded
         self.device_var, self.device_dropdown = create_dropdown(
-            self.input_frame, [""] + list(self.device_map.keys()), width=10
+            self.input_frame, [""], width=10
         )
 
         # Arrange labels and fields
@@ -72,12 +78,49 @@ class UserManagementUI:
             borderwidth=0,
         ).grid(row=1, column=6, padx=10, pady=2)
 
+        # Search: every change re-queries the database once typing pauses
+        self.search_frame = tk.Frame(self.root, bg=WHITE_COLOR)
+        self.search_frame.pack(fill="x", padx=10, pady=5)
+
+        self.search_var = tk.StringVar(self.search_frame)
+        self.search_group_var = tk.StringVar(self.search_frame)
+        self.search_device_var, self.search_device_dropdown = create_dropdown(
+            self.search_frame, [""], width=10
+        )
+        create_label_entry_row(
+            self.search_frame,
+            [
+                (
+                    "Search Name / User ID:",
+                    tk.Entry(self.search_frame, width=25, textvariable=self.search_var),
+                ),
+                (
+                    "Group ID:",
+                    tk.Entry(
+                        self.search_frame, width=10, textvariable=self.search_group_var
+                    ),
+                ),
+                ("Device:", self.search_device_dropdown),
+            ],
+        )
+        for var in (self.search_var, self.search_group_var, self.search_device_var):
+            var.trace_add("write", self.schedule_search)
+
         self.table_frame = tk.Frame(self.root, bg=WHITE_COLOR)
         self.table_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        create_table_headers(
+        self.table = VirtualTable(
             self.table_frame,
-            ["ID", "Name", "Privilege", "User ID", "Group ID", "Device", "Actions"],
+            columns=[
+                ("id", "ID"),
+                ("name", "Name"),
+                ("privilege", "Privilege"),
+                ("user_id", "User ID"),
+                ("group_id", "Group ID"),
+                ("device_name", "Device"),
+            ],
+            actions=[("✏️", self.edit_user), ("🗑️", self.delete_user)],
+            tasks=self.tasks,
         )
 
         self.back_frame = tk.Frame(self.root, bg=WHITE_COLOR)
@@ -94,48 +137,63 @@ class UserManagementUI:
             borderwidth=0,
         ).pack(side="right", padx=10)
 
+        self.tasks.submit(self.logic.get_devices, on_success=self.set_devices)
         self.display_users()
 
+    def set_devices(self, devices):
+        self.device_map = {d["name"]: d["id"] for d in devices}
+        if self.device_dropdown.winfo_exists():
+            self.device_dropdown.set_menu("", "", *self.device_map)
+            self.search_device_dropdown.set_menu("", "", *self.device_map)
+
+    def search_filters(self):
+        """Return the search box and filter values as `search_users` arguments."""
+        return {
+            "text": self.search_var.get().strip(),
+            "group_id": self.search_group_var.get().strip(),
+            "device_id": self.device_map.get(self.search_device_var.get()),
+        }
+
+    def schedule_search(self, *_):
+        """Re-run the search once no filter has changed for a moment."""
+        if self.search_job:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    def apply_search(self):
+        self.search_job = None
+        if self.search_filters() != self.filters:
+            self.display_users()
+
     def display_users(self):
-        for widget in self.table_frame.winfo_children():
-            if widget.grid_info().get("row", 0) > 0:
-                widget.destroy()
-
-        users = self.logic.get_users()
-        for row, user in enumerate(users, start=1):
-            for col, value in enumerate(
-                [
-                    user["id"],
-                    user["name"],
-                    user["privilege"],
-                    user["user_id"],
-                    user["group_id"],
-                    user["device_name"],
-                ]
-            ):
-                tk.Label(
-                    self.table_frame,
-                    text=value,
-                    bg=WHITE_COLOR,
-                    relief="solid",
-                    padx=10,
-                    pady=5,
-                ).grid(row=row, column=col, sticky="nsew")
-
-            actions_frame = tk.Frame(self.table_frame, bg=WHITE_COLOR, relief="solid")
-            actions_frame.grid(row=row, column=6, sticky="nsew")
-
-            create_icon_button(
-                parent=actions_frame,
-                icon="✏️",
-                command=lambda idx=user["id"]: self.edit_user(idx),
+        # Read on the main thread; the pages are fetched by a worker
+        filters = self.filters = self.search_filters()
+        if any(filters.values()):
+            self.table.fetch_page = lambda cursor: self.logic.search_users(
+                **filters, after=cursor, limit=USERS_PAGE
             )
-
-            create_icon_button(
-                parent=actions_frame,
-                icon="🗑️",
-                command=lambda idx=user["id"]: self.delete_user(idx),
+        else:
+            self.table.fetch_page = lambda cursor: self.logic.get_users_page(
+                cursor, USERS_PAGE
             )
+        self.table.reload()
+
+    def refresh_user(self, id_user):
+        """Redraw one user's row from the database instead of the whole table.
+
+        While a search is shown the user may no longer match it, or belong
+        elsewhere in its name order, so the search is run again instead.
+        """
+        if any(self.filters.values()):
+            return self.display_users()
+
+        def loaded(user):
+            if user:
+                self.table.upsert_row(user)
+            else:
+                self.table.remove_row(id_user)
+
+        self.tasks.submit(self.logic.get_user, id_user, on_success=loaded)
 
     def handle_add_user(self):
         name = self.name_entry.get()
@@ -145,9 +203,19 @@ class UserManagementUI:
         group_id = self.group_id_entry.get()
         device_id = self.device_map.get(self.device_var.get())
 
-        success, message = self.logic.add_user(
-            name, privilege, password, user_id, group_id, device_id
+        self.tasks.submit(
+            self.logic.add_user,
+            name,
+            privilege,
+            password,
+            user_id,
+            group_id,
+            device_id,
+            on_success=self.user_added,
         )
+
+    def user_added(self, result):
+        success, message = result
         if success:
             for entry in [
                 self.name_entry,
@@ -158,12 +226,11 @@ class UserManagementUI:
             ]:
                 entry.delete(0, tk.END)
             self.device_var.set("")
-            self.display_users()
+            self.refresh_user(message)
         messagebox.showinfo("Success" if success else "Error", message)
 
     def edit_user(self, id_user):
-        self.display_users()  # Refresh user list
-        user = next((u for u in self.logic.get_users() if u["id"] == id_user), None)
+        user = next((u for u in self.table.rows if u["id"] == id_user), None)
         if not user:
             return messagebox.showerror("Error", "User not found.")
 
@@ -186,16 +253,21 @@ class UserManagementUI:
             config=config,
             data=user,
             save_callback=save_callback,
-            draw_table_callback=self.display_users,
+            draw_table_callback=lambda: self.refresh_user(id_user),
             dropdown_options={"device_name": [""] + list(self.device_map.keys())},
+            tasks=self.tasks,
         )
 
     def delete_user(self, user_id):
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this user?"):
-            success, message = self.logic.delete_user(user_id)
-            if success:
-                self.display_users()
-            messagebox.showinfo("Success" if success else "Error", message)
+
+            def deleted(result):
+                success, message = result
+                if success:
+                    self.table.remove_row(user_id)
+                messagebox.showinfo("Success" if success else "Error", message)
+
+            self.tasks.submit(self.logic.delete_user, user_id, on_success=deleted)
 
     def go_back(self):
         if self.navigate:
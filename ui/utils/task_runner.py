@@ -0,0 +1,83 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskRunner:
+    """Runs blocking work off the Tk main thread and hands results back to it.
+
+    Tk widgets may only be touched from the thread running `mainloop`, so
+    workers never call back into Tk: finished tasks are queued and the queue
+    is drained from a `root.after` poll, which runs the callbacks on the main
+    thread. Device and database calls made from a Tk callback should go
+    through `submit` so the window never freezes waiting on them.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=50):
+        """Initialize the runner.
+
+        Args:
+            root (tk.Tk): Window whose event loop runs the callbacks.
+            max_workers (int): Maximum number of tasks run at once (default: 4).
+            poll_ms (int): Milliseconds between checks for finished tasks while
+                any are pending (default: 50).
+        """
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ui-task"
+        )
+        self._done = queue.SimpleQueue()
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, fn, *args, on_success=None, on_error=None, **kwargs):
+        """Run `fn(*args, **kwargs)` on a worker thread.
+
+        Args:
+            fn (callable): Blocking function to run.
+            on_success (callable, optional): Called on the main thread with the
+                return value of `fn`.
+            on_error (callable, optional): Called on the main thread with the
+                exception raised by `fn`; by default the error is printed.
+
+        Returns:
+            Future: The running task.
+        """
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._pending += 1
+        future.add_done_callback(lambda f: self._done.put((f, on_success, on_error)))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+        return future
+
+    def _poll(self):
+        while True:
+            try:
+                future, on_success, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if future.cancelled():
+                continue
+            error = future.exception()
+            try:
+                if error is None:
+                    if on_success:
+                        on_success(future.result())
+                elif on_error:
+                    on_error(error)
+                else:
+                    print(f"Background task failed: {error}")
+            except Exception as e:
+                # A callback for a screen that has since been closed
+                print(f"Task callback failed: {e}")
+
+        if self._pending:
+            self.root.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def shutdown(self):
+        """Stop accepting tasks; running ones finish in the background."""
+        self._executor.shutdown(wait=False, cancel_futures=True)